@@ -0,0 +1,37 @@
+from pydantic import AnyHttpUrl, BaseSettings, Field
+from functools import lru_cache
+import os
+
+# .env next to the app package, used when the process is not started from the repo root
+_PROJECT_ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+_ENV_LOADED = False
+
+def ensure_env():
+    """Load .env into os.environ once per process, importing dotenv only if a file exists"""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    env_file = next((path for path in (".env", _PROJECT_ENV_FILE) if os.path.exists(path)), None)
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+    _ENV_LOADED = True
+
+class Settings(BaseSettings):
+    """
+    Request defaults resolved from the environment (and .env) once per process
+    """
+    destination_folder: str = Field("/home/videos/screenRecordings", env="DEFAULT_DESTINATION_FOLDER")
+    callback_url: AnyHttpUrl = Field("http://localhost:5678/webhook/9268d2b1-e4de-421e-9685-4c5aa5e79289", env="DEFAULT_CALLBACK_URL")
+    scene_threshold: float = Field(0.4, env="SCENE_THRESHOLD")
+    download_folder: str = Field("/home/jason/Downloads", env="DEFAULT_DOWNLOAD_FOLDER")
+    api_version: str = Field("1.0.0", env="API_VERSION")
+
+    class Config:
+        frozen = True
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Return the process-wide settings, built on first use"""
+    ensure_env()
+    return Settings()
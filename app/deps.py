@@ -0,0 +1,7 @@
+from functools import lru_cache
+from app.utils.video_processor import VideoProcessor
+
+@lru_cache(maxsize=1)
+def get_processor() -> VideoProcessor:
+    """Shared VideoProcessor instance (it holds no per-request state)"""
+    return VideoProcessor()
@@ -1,4 +1,5 @@
 import httpx
+import orjson
 import asyncio
 import logging
 import json
@@ -12,11 +13,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger("gradio-health-check")
 
-async def check_gradio_health(gradio_url: str = "http://localhost:7860") -> Tuple[bool, Dict[str, Any]]:
+async def check_gradio_health(client: httpx.AsyncClient, gradio_url: str = "http://localhost:7860") -> Tuple[bool, Dict[str, Any]]:
     """
     Check if the Gradio server is running and accessible.
     
     Args:
+        client: Shared HTTP client
         gradio_url: URL of the Gradio server
         
     Returns:
@@ -30,56 +32,64 @@ async def check_gradio_health(gradio_url: str = "http://localhost:7860") -> Tupl
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # Try to connect to the root path
-            logger.info(f"Checking Gradio server at {gradio_url}")
-            response = await client.get(f"{gradio_url}/", timeout=5.0)
-            
-            result["details"]["root_status_code"] = response.status_code
-            
-            # Try to get session
-            try:
-                session_response = await client.post(f"{gradio_url}/api/sessions", timeout=5.0)
-                result["details"]["session_status_code"] = session_response.status_code
-                
-                if session_response.status_code == 200:
-                    session_data = session_response.json()
-                    result["details"]["session_hash"] = session_data.get("session_hash", "not found")
-                    
-                    # Try a basic API call with the session
-                    if "session_hash" in session_data:
-                        predict_response = await client.post(
-                            f"{gradio_url}/api/predict",
-                            json={
-                                "session_hash": session_data["session_hash"],
-                                "fn_index": 0
-                            },
-                            timeout=5.0
-                        )
-                        result["details"]["predict_status_code"] = predict_response.status_code
-            except Exception as e:
-                result["details"]["session_error"] = str(e)
+        # Try to connect to the root path
+        logger.info(f"Checking Gradio server at {gradio_url}")
+        response = await client.get(f"{gradio_url}/", timeout=5.0)
+        
+        result["details"]["root_status_code"] = response.status_code
+        
+        # The session and config probes are independent, so issue them together
+        session_response, config_response = await asyncio.gather(
+            client.post(f"{gradio_url}/api/sessions", timeout=5.0),
+            client.get(f"{gradio_url}/config", timeout=5.0),
+            return_exceptions=True
+        )
+        
+        # Try to get session
+        try:
+            if isinstance(session_response, Exception):
+                raise session_response
+            result["details"]["session_status_code"] = session_response.status_code
             
-            # Check if we can get the config
-            try:
-                config_response = await client.get(f"{gradio_url}/config", timeout=5.0)
-                result["details"]["config_status_code"] = config_response.status_code
+            if session_response.status_code == 200:
+                session_data = orjson.loads(session_response.content)
+                result["details"]["session_hash"] = session_data.get("session_hash", "not found")
                 
-                if config_response.status_code == 200:
-                    config = config_response.json()
-                    result["details"]["app_version"] = config.get("version", "unknown")
-                    result["details"]["components"] = len(config.get("components", []))
-            except Exception as e:
-                result["details"]["config_error"] = str(e)
+                # Try a basic API call with the session
+                if "session_hash" in session_data:
+                    predict_response = await client.post(
+                        f"{gradio_url}/api/predict",
+                        json={
+                            "session_hash": session_data["session_hash"],
+                            "fn_index": 0
+                        },
+                        timeout=5.0
+                    )
+                    result["details"]["predict_status_code"] = predict_response.status_code
+        except Exception as e:
+            result["details"]["session_error"] = str(e)
+        
+        # Check if we can get the config
+        try:
+            if isinstance(config_response, Exception):
+                raise config_response
+            result["details"]["config_status_code"] = config_response.status_code
             
-            # Final health determination
-            if response.status_code == 200:
-                result["status"] = "healthy"
-                result["message"] = "Gradio server is running"
-                return True, result
-            else:
-                result["message"] = f"Gradio server returned status code {response.status_code}"
-                return False, result
+            if config_response.status_code == 200:
+                config = orjson.loads(config_response.content)
+                result["details"]["app_version"] = config.get("version", "unknown")
+                result["details"]["components"] = len(config.get("components", []))
+        except Exception as e:
+            result["details"]["config_error"] = str(e)
+        
+        # Final health determination
+        if response.status_code == 200:
+            result["status"] = "healthy"
+            result["message"] = "Gradio server is running"
+            return True, result
+        else:
+            result["message"] = f"Gradio server returned status code {response.status_code}"
+            return False, result
                 
     except httpx.ConnectError:
         result["message"] = "Failed to connect to Gradio server"
@@ -91,11 +101,12 @@ async def check_gradio_health(gradio_url: str = "http://localhost:7860") -> Tupl
         result["message"] = f"Unexpected error: {str(e)}"
         return False, result
 
-async def check_drive_api_connection(api_url: str = "https://www.googleapis.com/drive/v3/files") -> Tuple[bool, Dict[str, Any]]:
+async def check_drive_api_connection(client: httpx.AsyncClient, api_url: str = "https://www.googleapis.com/drive/v3/files") -> Tuple[bool, Dict[str, Any]]:
     """
     Check if the Google Drive API is accessible.
     
     Args:
+        client: Shared HTTP client
         api_url: Google Drive API URL
         
     Returns:
@@ -109,25 +120,24 @@ async def check_drive_api_connection(api_url: str = "https://www.googleapis.com/
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # This will fail without auth, but we can check if we get an auth error (which means the API is reachable)
-            logger.info(f"Checking Google Drive API at {api_url}")
-            response = await client.get(api_url, timeout=5.0)
-            
-            result["details"]["status_code"] = response.status_code
-            
-            # Google will return 401 if the API is reachable but unauthorized
-            if response.status_code == 401:
-                result["status"] = "reachable"
-                result["message"] = "Google Drive API is reachable but requires authentication"
-                return True, result
-            elif response.status_code == 200:
-                result["status"] = "healthy"
-                result["message"] = "Google Drive API is accessible"
-                return True, result
-            else:
-                result["message"] = f"Google Drive API returned unexpected status code {response.status_code}"
-                return False, result
+        # This will fail without auth, but we can check if we get an auth error (which means the API is reachable)
+        logger.info(f"Checking Google Drive API at {api_url}")
+        response = await client.get(api_url, timeout=5.0)
+        
+        result["details"]["status_code"] = response.status_code
+        
+        # Google will return 401 if the API is reachable but unauthorized
+        if response.status_code == 401:
+            result["status"] = "reachable"
+            result["message"] = "Google Drive API is reachable but requires authentication"
+            return True, result
+        elif response.status_code == 200:
+            result["status"] = "healthy"
+            result["message"] = "Google Drive API is accessible"
+            return True, result
+        else:
+            result["message"] = f"Google Drive API returned unexpected status code {response.status_code}"
+            return False, result
                 
     except httpx.ConnectError:
         result["message"] = "Failed to connect to Google Drive API"
@@ -142,10 +152,13 @@ async def check_drive_api_connection(api_url: str = "https://www.googleapis.com/
 async def main():
     # Check Gradio server
     gradio_url = "http://localhost:7860"  # Default Gradio port
-    is_gradio_healthy, gradio_result = await check_gradio_health(gradio_url)
     
-    # Check Google Drive API
-    is_drive_accessible, drive_result = await check_drive_api_connection()
+    # Check Gradio and the Google Drive API concurrently over one client
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        (is_gradio_healthy, gradio_result), (is_drive_accessible, drive_result) = await asyncio.gather(
+            check_gradio_health(client, gradio_url),
+            check_drive_api_connection(client)
+        )
     
     # Combine results
     results = {
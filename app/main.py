@@ -1,17 +1,29 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.routers import video, gradio
+from app.utils.gradio_client import GradioClient
+from app.config import ensure_env, get_settings
+import asyncio
 import logging
 import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional Brotli compression (pip install brotli-asgi), gzip is used otherwise
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # Load environment variables from .env file if it exists
-load_dotenv()
+ensure_env()
 
 # Get configuration from environment variables
-API_VERSION = os.getenv("API_VERSION", "1.0.0")
+API_VERSION = get_settings().api_version
 ENABLE_GRADIO = os.getenv("ENABLE_GRADIO", "true").lower() in ("true", "1", "yes")
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() in ("true", "1", "yes")
+THREADPOOL_MAX_WORKERS = int(os.getenv("THREADPOOL_MAX_WORKERS", "200"))
 
 # Configure logging
 logging.basicConfig(
@@ -36,7 +48,8 @@ app = FastAPI(
     title="Video Scene Detector",
     description="API for processing videos and extracting frames based on scene detection",
     version=API_VERSION,
-    debug=DEBUG_MODE
+    debug=DEBUG_MODE,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -48,6 +61,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses; BrotliMiddleware falls back to gzip for clients without br support
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include routers
 app.include_router(video.router, prefix="/api/v1", tags=["video"])
 
@@ -58,8 +77,13 @@ if ENABLE_GRADIO:
 else:
     logger.info("Gradio integration disabled")
 
-# Add routes directly to app for easier access (optional)
-app.include_router(video.router, tags=["video-direct"])
+# Unprefixed aliases for existing clients, registered per route rather than mounting the
+# video router twice; hidden from the schema
+app.add_api_route("/process-video", video.process_video, methods=["POST"],
+                  response_model=video.VideoProcessResponse, include_in_schema=False)
+app.add_api_route("/process-drive-video", video.process_drive_video, methods=["POST"], include_in_schema=False)
+app.add_api_route("/health", video.health_check, methods=["GET"],
+                  response_model=video.HealthResponse, include_in_schema=False)
 
 # Startup event
 @app.on_event("startup")
@@ -67,14 +91,41 @@ async def startup_event():
     logger.info(f"Starting Video Scene Detector API v{API_VERSION}")
     logger.info(f"Debug mode: {DEBUG_MODE}")
     
+    # Enlarge the default executor used by Starlette for sync endpoints and background tasks
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_MAX_WORKERS))
+    
     # Check if the credentials file exists
     credentials_path = os.getenv("GOOGLE_CREDENTIALS", "credentials.json")
     if os.path.exists(credentials_path):
         logger.info(f"Google Drive credentials found at {credentials_path}")
     else:
         logger.warning(f"Google Drive credentials not found at {credentials_path}")
+    
+    # Expire old entries from the webhook dedup tracker in the background
+    app.state.webhook_pruner = asyncio.create_task(video.prune_webhook_tracker_periodically())
+    
+    # Resend callbacks that exhausted their retries, if a dead-letter directory is configured
+    app.state.dead_letter_redelivery = None
+    if video.CALLBACK_DEAD_LETTER_DIR:
+        app.state.dead_letter_redelivery = asyncio.create_task(video.redeliver_dead_letters_periodically())
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info("Shutting down Video Scene Detector API") 
\ No newline at end of file
+    logger.info("Shutting down Video Scene Detector API")
+    app.state.webhook_pruner.cancel()
+    if app.state.dead_letter_redelivery:
+        app.state.dead_letter_redelivery.cancel()
+    await GradioClient.aclose()
+    await video.close_callback_client()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("UVICORN_WORKERS", "1"))
+    )
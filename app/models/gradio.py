@@ -25,4 +25,4 @@ class HealthCheckResponse(BaseModel):
     status: str
     message: str
     details: Optional[Dict[str, Any]] = None
-    timestamp: Optional[str] = None 
\ No newline at end of file
+    timestamp: Optional[str] = None
@@ -1,10 +1,9 @@
 from pydantic import BaseModel, HttpUrl, AnyHttpUrl
-from typing import Optional, List, Dict
-import os
-from dotenv import load_dotenv
+from typing import Optional, List, Dict, Any
+from app.config import get_settings
 
-# Load environment variables
-load_dotenv()
+# Request defaults, resolved and validated once at import
+_settings = get_settings()
 
 class SceneMetadata(BaseModel):
     """
@@ -21,9 +20,9 @@ class GoogleDriveVideoProcessRequest(BaseModel):
     """
     file_id: str  # Google Drive file ID
     file_name: Optional[str] = None  # If None, will be retrieved from Google Drive
-    destination_folder: str = os.getenv("DEFAULT_DESTINATION_FOLDER", "/home/videos/screenRecordings")  # Default destination folder
-    callback_url: AnyHttpUrl = os.getenv("DEFAULT_CALLBACK_URL", "http://localhost:5678/webhook/9268d2b1-e4de-421e-9685-4c5aa5e79289")  # Default webhook URL
-    scene_threshold: float = float(os.getenv("SCENE_THRESHOLD", "0.4"))  # Scene detection threshold (0.0-1.0)
+    destination_folder: str = _settings.destination_folder  # Default destination folder
+    callback_url: AnyHttpUrl = _settings.callback_url  # Default webhook URL
+    scene_threshold: float = _settings.scene_threshold  # Scene detection threshold (0.0-1.0)
     create_subfolder: bool = True  # Whether to create a subfolder for the video
     delete_after_processing: Optional[bool] = False  # Whether to delete video file after successful callback
     force_download: Optional[bool] = False  # Whether to force download even if file exists locally
@@ -34,10 +33,11 @@ class VideoProcessRequest(BaseModel):
     Request model for video processing endpoint (traditional local file)
     """
     filename: str
-    download_folder: Optional[str] = os.getenv("DEFAULT_DOWNLOAD_FOLDER", "/home/jason/Downloads")  # Default download folder
-    destination_folder: Optional[str] = os.getenv("DEFAULT_DESTINATION_FOLDER", "/home/videos/screenRecordings")  # Default destination
-    callback_url: Optional[AnyHttpUrl] = os.getenv("DEFAULT_CALLBACK_URL", "http://localhost:5678/webhook/9268d2b1-e4de-421e-9685-4c5aa5e79289")  # Default webhook URL for n8n
-    scene_threshold: Optional[float] = float(os.getenv("SCENE_THRESHOLD", "0.4"))  # Scene detection threshold
+    download_folder: Optional[str] = _settings.download_folder  # Default download folder
+    destination_folder: Optional[str] = _settings.destination_folder  # Default destination
+    callback_url: Optional[AnyHttpUrl] = _settings.callback_url  # Default webhook URL for n8n
+    scene_threshold: Optional[float] = _settings.scene_threshold  # Scene detection threshold
+    background: Optional[bool] = False  # Return immediately and deliver results only via the callback
 
 class VideoProcessResponse(BaseModel):
     """
@@ -53,7 +53,7 @@ class VideoProcessResponse(BaseModel):
     processing_time: Optional[float] = None
     scene_metadata: Optional[List[SceneMetadata]] = None
     ffmpeg_output: Optional[Dict[str, str]] = None
-    video_info: Optional[str] = None
+    video_info: Optional[Dict[str, Any]] = None  # Parsed ffprobe output
     error: Optional[str] = None
     file_path: Optional[str] = None
     process_id: Optional[str] = None
@@ -63,4 +63,4 @@ class HealthResponse(BaseModel):
     Response model for health check endpoint
     """
     status: str
-    version: str = os.getenv("API_VERSION", "1.0.0") 
\ No newline at end of file
+    version: str = _settings.api_version
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Body
+from fastapi.responses import Response
 from app.models.gradio import GradioRequest, GradioResponse, HealthCheckResponse
 from app.utils.gradio_client import GradioClient
 import logging
+from typing import Any, Dict
 import datetime
 
 # Configure logging
@@ -14,9 +16,10 @@ async def check_gradio_health():
     """
     Check if the Gradio server is running and accessible
     """
+    # One timestamp per check, shared by both branches
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
     try:
         is_healthy, details = await GradioClient.check_health()
-        timestamp = datetime.datetime.now().isoformat()
         
         return HealthCheckResponse(
             status="healthy" if is_healthy else "unhealthy",
@@ -29,32 +32,35 @@ async def check_gradio_health():
         return HealthCheckResponse(
             status="error",
             message=f"Error checking Gradio health: {str(e)}",
-            timestamp=datetime.datetime.now().isoformat()
+            timestamp=timestamp
         )
 
-@router.get("/gradio-data")
+@router.get("/gradio-data", response_model=None)
 async def get_gradio_data():
     """
     Get data from Gradio with automatic session handling
     """
     try:
-        result = await GradioClient.get_data()
-        return result
+        body, content_type = await GradioClient.get_data()
+        # Upstream payload is opaque; pass the bytes straight through
+        return Response(content=body, media_type=content_type, status_code=200)
     except Exception as e:
         logger.error(f"Error fetching Gradio data: {str(e)}")
         raise
 
-@router.post("/gradio-data")
-async def post_gradio_data(request: GradioRequest):
+@router.post("/gradio-data", response_model=None)
+async def post_gradio_data(payload: Dict[str, Any] = Body(...)):
     """
     Send data to Gradio and get response
     """
+    # The body is forwarded to Gradio as-is, so skip validating the (possibly large) data list
+    request = GradioRequest.construct(**payload)
     try:
-        result = await GradioClient.get_data(
+        body, content_type = await GradioClient.get_data(
             fn_index=request.fn_index,
             data=request.data
         )
-        return result
+        return Response(content=body, media_type=content_type, status_code=200)
     except Exception as e:
         logger.error(f"Error posting to Gradio: {str(e)}")
         raise 
\ No newline at end of file
@@ -1,112 +1,143 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi.responses import Response
 from app.models.video import VideoProcessRequest, VideoProcessResponse, HealthResponse, GoogleDriveVideoProcessRequest
-from app.utils.video_processor import VideoProcessor
+from app.utils.video_processor import VideoProcessor, is_frame_file
+from app.deps import get_processor
 from app.utils.google_drive import GoogleDriveService
+from app.utils.metadata_batcher import get_metadata_batcher
+import httpx
 import logging
-import json
+import gzip
+import orjson
 import os
+import random
 import time
-import glob
-from pathlib import Path
-import requests
-from dotenv import load_dotenv
+from app.config import ensure_env
 import uuid
 import asyncio
 from datetime import datetime
-from typing import Optional, Dict, List, Any, Union
+from typing import Optional, Dict, List, Any, Tuple, Union
 import shutil
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Add a dictionary to track which tasks have already sent webhooks
-webhook_sent_tracker = {}
+# Track which tasks have already sent webhooks (process_id -> monotonic send time), oldest first.
+# Bounded so a long-running server cannot grow it without limit.
+WEBHOOK_TRACKER_MAX_ENTRIES = 10000
+WEBHOOK_TRACKER_TTL = 3600  # 1 hour
+WEBHOOK_TRACKER_PRUNE_INTERVAL = 600  # 10 minutes
+webhook_sent_tracker: "OrderedDict[str, float]" = OrderedDict()
+webhook_tracker_lock = threading.Lock()
+
+# Webhook endpoints and delays, read once at import
+FRAME_ANALYSIS_WEBHOOK_URL = os.getenv("FRAME_ANALYSIS_WEBHOOK_URL", "http://localhost:5678/webhook/9268d2b1-e4de-421e-9685-4c5aa5e79289")
+FRAME_PROCESSOR_WEBHOOK_URL = os.getenv("FRAME_PROCESSOR_WEBHOOK_URL", "http://localhost:5678/webhook/c9af1341-63b6-43fa-a5fc-c7fefc6ab732")
+WEBHOOK_DELAY_MIN = int(os.getenv("WEBHOOK_DELAY_MIN", "15"))
+WEBHOOK_DELAY_PER_FRAME = float(os.getenv("WEBHOOK_DELAY_PER_FRAME", "0.75"))
+WEBHOOK_DELAY_MAX = int(os.getenv("WEBHOOK_DELAY_MAX", "300"))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "300"))
+CALLBACK_MAX_TRIES = 4
+CALLBACK_RETRY_BASE_DELAY = 0.5
+CALLBACK_RETRY_MAX_DELAY = 10.0
+# Optional gzip request bodies for receivers that accept Content-Encoding: gzip (n8n does)
+CALLBACK_GZIP = os.getenv("CALLBACK_GZIP", "false").lower() == "true"
+CALLBACK_GZIP_MIN_BYTES = int(os.getenv("CALLBACK_GZIP_MIN_BYTES", "16384"))
+# Callbacks that still fail after retries are kept here (if set) and redelivered in the background
+CALLBACK_DEAD_LETTER_DIR = os.getenv("CALLBACK_DEAD_LETTER_DIR")
+CALLBACK_REDELIVERY_INTERVAL = int(os.getenv("CALLBACK_REDELIVERY_INTERVAL", "300"))
+# Per-host circuit breaker: after this many consecutive failed callbacks, skip the host for a cooldown
+CALLBACK_BREAKER_FAIL_MAX = int(os.getenv("CALLBACK_BREAKER_FAIL_MAX", "5"))
+CALLBACK_BREAKER_RESET_TIMEOUT = float(os.getenv("CALLBACK_BREAKER_RESET_TIMEOUT", "60"))
+# host -> (consecutive failures, time of the last failure); only touched from the event loop
+callback_breaker_state: Dict[str, Tuple[int, float]] = {}
+SCENE_THRESHOLD = float(os.getenv("SCENE_THRESHOLD", "0.4"))
+
+# Per-frame details are written to a JSON Lines manifest next to the frames; inlining the full
+# frames_info list in webhooks can be turned off. The manifest is uploaded to the Drive folder
+# only when enabled, by default exactly when frames_info is not inlined.
+FRAMES_MANIFEST_NAME = "frames_manifest.jsonl"
+INLINE_FRAMES_INFO = os.getenv("INLINE_FRAMES_INFO", "true").lower() == "true"
+UPLOAD_FRAMES_MANIFEST = os.getenv("UPLOAD_FRAMES_MANIFEST", str(not INLINE_FRAMES_INFO)).lower() == "true"
+
+# Kept videos are not read again once their frames are out, so their cached pages can be dropped
+DROP_VIDEO_PAGE_CACHE = os.getenv("DROP_VIDEO_PAGE_CACHE", "false").lower() == "true"
+
+# Optional incremental delivery of uploaded frames while extraction is still running
+FRAME_BATCH_WEBHOOK_URL = os.getenv("FRAME_BATCH_WEBHOOK_URL")
+FRAME_BATCH_SIZE = int(os.getenv("FRAME_BATCH_SIZE", "50"))
+FRAME_BATCH_QUEUE_SIZE = 4  # Batches buffered before upload workers wait on the webhook
+
+# Shared client for webhook callbacks so repeat posts to n8n reuse warm connections
+_callback_client: Optional[httpx.AsyncClient] = None
+
+def get_callback_client() -> httpx.AsyncClient:
+    """Get the shared webhook client, creating it on first use"""
+    global _callback_client
+    if _callback_client is None:
+        _callback_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16)
+        )
+    return _callback_client
+
+async def close_callback_client():
+    """Close the shared webhook client"""
+    global _callback_client
+    if _callback_client is not None:
+        await _callback_client.aclose()
+        _callback_client = None
 
 @router.post("/process-video", response_model=VideoProcessResponse)
-async def process_video(request: VideoProcessRequest) -> VideoProcessResponse:
+async def process_video(request: VideoProcessRequest, background_tasks: BackgroundTasks,
+                        processor: VideoProcessor = Depends(get_processor)) -> VideoProcessResponse:
     """
     Process a video file:
     1. Create a safe directory for the video
     2. Move the video file to the new directory
     3. Extract frames using FFmpeg
     4. Send results to callback URL if provided
+    
+    With background set, returns immediately and the results only go to the callback URL.
     """
-    try:
-        # Initialize video processor
-        processor = VideoProcessor()
-        
-        # Create safe directory for video
-        output_dir = processor.create_safe_directory(
-            request.destination_folder,
-            request.filename
-        )
-        
-        # Move video file
-        success, result = processor.move_video_file(
-            request.download_folder,
-            output_dir,
-            request.filename
-        )
-        
-        if not success:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to move video file: {result}"
-            )
-        
-        # Extract frames
-        video_path = result  # This is the new path of the moved video
-        success, extraction_result = processor.extract_frames(
-            video_path,
-            output_dir,
-            request.scene_threshold
-        )
-        
-        if not success:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Frame extraction failed: {extraction_result.get('error', 'Unknown error')}"
-            )
-        
-        # Prepare response
-        response_data = {
+    if request.background:
+        background_tasks.add_task(process_local_video_task, request, processor)
+        # Return clean success response without nulls
+        return Response(content=orjson.dumps({
             "success": True,
-            "message": "Video processed successfully",
-            "frames_extracted": extraction_result["frames_extracted"],
-            "output_directory": extraction_result["output_directory"],
-            "processing_time": extraction_result["processing_time"],
-            "scene_metadata": extraction_result["scene_metadata"],
-            "video_info": json.loads(extraction_result["video_info"]) if extraction_result["video_info"] else None
-        }
-        
-        # Clean up ffmpeg output to avoid sending too much data
-        callback_data = {**response_data}
-        if "ffmpeg_output" in extraction_result:
-            # Only include the first 1000 characters of stderr for the callback
-            # to avoid making the payload too large
-            stderr_sample = extraction_result["ffmpeg_output"]["stderr"][:1000]
-            callback_data["ffmpeg_output"] = {
-                "stderr_sample": stderr_sample + ("..." if len(extraction_result["ffmpeg_output"]["stderr"]) > 1000 else "")
-            }
+            "message": f"Processing started for file: {request.filename}. Results will be sent to callback URL when complete."
+        }), media_type="application/json")
+    
+    try:
+        response_data = await extract_local_video(request, processor)
         
         # Always send callback with the processed data
         logger.info(f"Sending callback to: {request.callback_url}")
-        callback_success = processor.send_callback(
+        callback_success = await send_callback(
             str(request.callback_url),
-            callback_data
+            response_data
         )
+        response_data.pop("ffmpeg_output", None)
         
         if not callback_success:
             logger.warning(f"Failed to send callback to {request.callback_url}")
             # Add the callback failure to the response
             response_data["message"] += ", but callback failed"
         
-        return VideoProcessResponse(**response_data)
+        # response_data is built here from trusted processor output, so skip validation
+        # (FastAPI would re-validate a returned model against response_model). The
+        # constructed model's fields are plain dicts/lists, so orjson encodes them
+        # directly without the recursive copy .dict() would make.
+        response = VideoProcessResponse.construct(**response_data)
+        return Response(content=orjson.dumps(response.__dict__), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
@@ -115,6 +146,82 @@ async def process_video(request: VideoProcessRequest) -> VideoProcessResponse:
             detail=f"Error processing video: {str(e)}"
         )
 
+async def extract_local_video(request: VideoProcessRequest, processor: VideoProcessor) -> Dict[str, Any]:
+    """
+    Move a local video into its output directory and extract its frames, returning the
+    callback payload (including the ffmpeg_output sample)
+    """
+    # Filesystem work and FFmpeg block, so they run on the default executor and the
+    # event loop stays free for health checks and other requests
+    loop = asyncio.get_event_loop()
+    
+    # Create safe directory for video
+    output_dir = await loop.run_in_executor(
+        None, processor.create_safe_directory, request.destination_folder, request.filename
+    )
+    
+    # Move video file
+    success, result = await loop.run_in_executor(
+        None, processor.move_video_file, request.download_folder, output_dir, request.filename
+    )
+    
+    if not success:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to move video file: {result}"
+        )
+    
+    # Extract frames
+    video_path = result  # This is the new path of the moved video
+    success, extraction_result = await loop.run_in_executor(
+        None, processor.extract_frames, video_path, output_dir, request.scene_threshold
+    )
+    
+    if not success:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Frame extraction failed: {extraction_result.get('error', 'Unknown error')}"
+        )
+    
+    # Prepare response
+    response_data = {
+        "success": True,
+        "message": "Video processed successfully",
+        "frames_extracted": extraction_result["frames_extracted"],
+        "output_directory": extraction_result["output_directory"],
+        "processing_time": extraction_result["processing_time"],
+        "scene_metadata": extraction_result["scene_metadata"],
+        "video_info": extraction_result["video_info"]
+    }
+    
+    # Clean up ffmpeg output to avoid sending too much data. Only the callback carries
+    # this key; the synchronous endpoint removes it before responding
+    if "ffmpeg_output" in extraction_result:
+        # The processor already caps stderr to its last 1000 characters
+        response_data["ffmpeg_output"] = {
+            "stderr_sample": extraction_result["ffmpeg_output"]["stderr"]
+        }
+    
+    return response_data
+
+async def process_local_video_task(request: VideoProcessRequest, processor: VideoProcessor):
+    """
+    Background variant of /process-video: the results, or the error, go to the callback URL
+    """
+    try:
+        response_data = await extract_local_video(request, processor)
+        logger.info("Sending callback to: %s", request.callback_url)
+        if not await send_callback(str(request.callback_url), response_data):
+            logger.warning("Failed to send callback to %s", request.callback_url)
+    except Exception as e:
+        error = getattr(e, "detail", None) or str(e)
+        logger.exception("Error processing video %s in background: %s", request.filename, error)
+        await send_callback(str(request.callback_url), {
+            "success": False,
+            "message": f"Error processing video: {error}",
+            "error": error
+        })
+
 @router.post("/process-drive-video")
 async def process_drive_video(request: GoogleDriveVideoProcessRequest, background_tasks: BackgroundTasks):
     """
@@ -131,20 +238,15 @@ async def process_drive_video(request: GoogleDriveVideoProcessRequest, backgroun
     logger.info(f"Processing video from Google Drive with file_id: {request.file_id}")
     
     try:
-        # Initialize services for validation
-        processor = VideoProcessor()
-        
         # Determine operation type based on download_account_type parameter
         download_operation_type = "download_primary" if request.download_account_type == "primary" else "download_secondary"
         logger.info(f"Using {request.download_account_type} account for download operations")
         
-        # Use the specified account credentials to validate files
-        drive_service = GoogleDriveService(operation_type=download_operation_type)
-        
-        # Validate request by checking if file exists in Google Drive
+        # Validate request by checking if file exists in Google Drive. Lookups for the same
+        # account that arrive within a few milliseconds share one Drive batch request.
         logger.info(f"Validating Google Drive file exists using {request.download_account_type} account credentials")
         try:
-            file_metadata = drive_service.get_file_metadata(request.file_id)
+            file_metadata = await get_metadata_batcher(download_operation_type).get_file_metadata(request.file_id)
             file_name = request.file_name or file_metadata.get('name', f'video_{request.file_id}')
             logger.info(f"File validated: {file_name} ({file_metadata.get('mimeType', 'unknown type')})")
         except Exception as e:
@@ -189,12 +291,12 @@ async def process_drive_video(request: GoogleDriveVideoProcessRequest, backgroun
             "file_id": request.file_id
         }
 
-def process_video_task(
+async def process_video_task(
     file_id: str,
     file_name: str,
     destination_folder: str,
     callback_url: str,
-    scene_threshold: float = float(os.getenv("SCENE_THRESHOLD", "0.4")),
+    scene_threshold: float = SCENE_THRESHOLD,
     create_subfolder: bool = True,
     delete_after_processing: bool = False,
     force_download: bool = False,
@@ -203,55 +305,61 @@ def process_video_task(
     """
     Background task to process video file and send callback when complete.
     """
-    start_time = time.time()
-    process_id = f"{int(start_time)}_{file_id[-6:]}"
-    logger.info(f"Starting background process {process_id} for file: {file_name}")
-    logger.info(f"Using {download_account_type} account for downloads")
+    start_time = time.monotonic()  # Durations use the monotonic clock; process_id needs wall time
+    process_id = f"{int(time.time())}_{file_id[-6:]}"
+    logger.info("Starting background process %s for file: %s", process_id, file_name)
+    logger.info("Using %s account for downloads", download_account_type)
     
     # Add this to track if we've already sent a webhook
     webhook_sent = False
     
+    # Downloading, FFmpeg and uploads block, so they run on the default executor
+    # while the webhook calls and waits stay on the event loop
+    loop = asyncio.get_event_loop()
+    
     try:
         # Initialize services
-        processor = VideoProcessor()
+        processor = get_processor()
         
         # Determine operation type based on download_account_type parameter
         download_operation_type = "download_primary" if download_account_type == "primary" else "download_secondary"
         
-        # Use the specified account credentials for downloading files
-        download_drive_service = GoogleDriveService(operation_type=download_operation_type)
-        
         # Create safe directory for video
-        logger.info(f"Creating output directory in {destination_folder}")
-        output_dir = processor.create_safe_directory(
-            destination_folder,
-            file_name,
-            create_subfolder=create_subfolder
+        logger.info("Creating output directory in %s", destination_folder)
+        output_dir = await loop.run_in_executor(
+            None, lambda: processor.create_safe_directory(destination_folder, file_name, create_subfolder=create_subfolder)
         )
         
         # Define download path
         download_path = os.path.join(output_dir, file_name)
         
-        # Check if file already exists locally
-        file_already_exists = os.path.exists(download_path)
+        # Check if file already exists locally (one stat gives both existence and size)
+        existing_size = await loop.run_in_executor(None, get_file_size, download_path)
+        file_already_exists = existing_size is not None
         
+        download_time = 0.0
         if file_already_exists and not force_download:
-            logger.info(f"File already exists at {download_path}. Skipping download.")
+            logger.info("File already exists at %s (%s bytes). Skipping download.", download_path, existing_size)
             download_result = download_path
         else:
             # Download file from Google Drive using specified account credentials
             if file_already_exists:
-                logger.info(f"File exists but force_download=True. Re-downloading file.")
+                logger.info("File exists but force_download=True. Re-downloading file.")
             else:
-                logger.info(f"File doesn't exist locally. Downloading from Google Drive.")
+                logger.info("File doesn't exist locally. Downloading from Google Drive.")
                 
-            logger.info(f"Downloading file from Google Drive to {output_dir} using {download_account_type} account")
-            success, download_result = download_drive_service.download_file(file_id, download_path)
+            logger.info("Downloading file from Google Drive to %s using %s account", output_dir, download_account_type)
+            download_start = time.monotonic()
+            # Build the service on the thread that downloads, so its per-thread client is the one used
+            success, download_result = await loop.run_in_executor(
+                None, download_from_drive, download_operation_type, file_id, download_path
+            )
+            download_time = time.monotonic() - download_start
             
             if not success:
                 error_msg = f"Failed to download file from Google Drive: {download_result}"
                 logger.error(error_msg)
-                send_callback(callback_url, {
+                await send_callback(callback_url, {
                     "success": False,
                     "message": error_msg,
                     "error": download_result,
@@ -259,21 +367,57 @@ def process_video_task(
                     "process_id": process_id,
                     "file_id": file_id,
                     "file_name": file_name,
-                    "processing_time": time.time() - start_time
+                    "processing_time": time.monotonic() - start_time
                 })
                 webhook_sent = True
                 return
         
-        logger.info(f"Using video file at: {download_path}")
+        logger.info("Using video file at: %s", download_path)
+        
+        # When a batch webhook is configured, uploaded frames are posted in batches as they
+        # complete. The queue is bounded so a slow receiver pushes back on the upload workers.
+        on_frame_uploaded = None
+        batch_queue = None
+        if FRAME_BATCH_WEBHOOK_URL:
+            batch_queue = asyncio.Queue(maxsize=FRAME_BATCH_QUEUE_SIZE)
+            batch_consumer = asyncio.ensure_future(
+                deliver_frame_batches(batch_queue, FRAME_BATCH_WEBHOOK_URL, process_id, file_id)
+            )
+            pending_frames: List[Dict[str, Any]] = []
+            pending_lock = threading.Lock()
+            
+            def on_frame_uploaded(frame_name: str, drive_file_id: str):
+                with pending_lock:
+                    pending_frames.append({"frame_name": frame_name, "drive_file_id": drive_file_id})
+                    if len(pending_frames) < FRAME_BATCH_SIZE:
+                        return
+                    batch = pending_frames[:]
+                    pending_frames.clear()
+                asyncio.run_coroutine_threadsafe(batch_queue.put(batch), loop).result()
         
         # Extract frames and upload them in real-time using streaming method
-        logger.info(f"Starting streaming extraction and upload with scene_threshold={scene_threshold}")
-        success, streaming_result = processor.extract_frames_with_streaming_upload(
-            download_path,
-            output_dir,
-            scene_threshold=scene_threshold,
-            original_filename=file_name
-        )
+        logger.info("Starting streaming extraction and upload with scene_threshold=%s", scene_threshold)
+        try:
+            success, streaming_result = await loop.run_in_executor(
+                None,
+                lambda: extract_and_publish_frames(
+                    processor,
+                    download_path,
+                    output_dir,
+                    scene_threshold=scene_threshold,
+                    original_filename=file_name,
+                    on_frame_uploaded=on_frame_uploaded
+                )
+            )
+        finally:
+            if batch_queue is not None:
+                with pending_lock:
+                    batch = pending_frames[:]
+                    pending_frames.clear()
+                if batch:
+                    await batch_queue.put(batch)
+                await batch_queue.put(None)
+                await batch_consumer
         
         if not success:
             error_msg = f"Failed to extract and upload frames: {streaming_result.get('error', 'Unknown error')}"
@@ -286,7 +430,7 @@ def process_video_task(
                 webhook_sent = True
                 return
             
-            send_callback(callback_url, {
+            await send_callback(callback_url, {
                 "success": False,
                 "message": error_msg,
                 "error": streaming_result.get('error', 'Unknown error'),
@@ -294,7 +438,7 @@ def process_video_task(
                 "process_id": process_id,
                 "file_id": file_id,
                 "file_name": file_name,
-                "processing_time": time.time() - start_time
+                "processing_time": time.monotonic() - start_time
             })
             webhook_sent = True
             return
@@ -303,23 +447,16 @@ def process_video_task(
         drive_upload_result = streaming_result
         extraction_result = streaming_result  # For compatibility with existing code
         
-        # Collect frame files info for response
-        frame_files = sorted(glob.glob(os.path.join(output_dir, "frame_*.jpg")))
-        frames_info = []
-        for frame_file in frame_files:
-            frame_path = Path(frame_file)
-            frames_info.append({
-                "filename": frame_path.name,
-                "path": str(frame_path),
-                "size_bytes": frame_path.stat().st_size
-            })
+        # Taken out of the result so drive_upload does not carry a second copy
+        frames_info = streaming_result.pop("frames_info")
+        frames_manifest = streaming_result.pop("frames_manifest")
         
-        logger.info(f"===== STREAMING PROCESS COMPLETE =====")
-        logger.info(f"Successfully processed and uploaded frames: {drive_upload_result.get('folder_name')}")
-        logger.info(f"Folder ID: {drive_upload_result.get('folder_id')}")
-        logger.info(f"Drive URL: {drive_upload_result.get('drive_folder_url')}")
-        logger.info(f"Frames uploaded: {drive_upload_result.get('frames_uploaded')}/{drive_upload_result.get('total_frames')}")
-        logger.info(f"Processing time: {drive_upload_result.get('processing_time')} seconds")
+        logger.info(
+            "===== STREAMING PROCESS COMPLETE ===== folder %s (ID %s, %s): %s/%s frames uploaded in %s seconds",
+            drive_upload_result.get('folder_name'), drive_upload_result.get('folder_id'),
+            drive_upload_result.get('drive_folder_url'), drive_upload_result.get('frames_uploaded'),
+            drive_upload_result.get('total_frames'), drive_upload_result.get('processing_time')
+        )
         
         # Verify upload completeness before proceeding with webhooks
         frames_uploaded = drive_upload_result.get('frames_uploaded', 0)
@@ -327,23 +464,21 @@ def process_video_task(
         failed_uploads = drive_upload_result.get('frames_failed', 0)
         
         if frames_uploaded < (total_frames - failed_uploads):
-            logger.warning(f"===== UPLOAD VERIFICATION FAILED =====")
-            logger.warning(f"Not all frames were uploaded successfully: {frames_uploaded}/{total_frames}")
-            logger.warning("Setting success to False to prevent premature webhook triggering")
+            logger.warning("===== UPLOAD VERIFICATION FAILED ===== only %s/%s frames uploaded; "
+                           "setting success to False to prevent premature webhook triggering", frames_uploaded, total_frames)
             success = False
             
             # Update drive_upload_result with verification status
             drive_upload_result["success"] = False
             drive_upload_result["warning"] = f"Upload verification failed: {frames_uploaded}/{total_frames} frames uploaded"
         else:
-            logger.info(f"===== UPLOAD VERIFICATION SUCCESSFUL =====")
-            logger.info(f"All required frames were uploaded successfully: {frames_uploaded}/{total_frames}")
+            logger.info("===== UPLOAD VERIFICATION SUCCESSFUL ===== %s/%s frames uploaded", frames_uploaded, total_frames)
             
             # Ensure drive_upload_result has success flag
             drive_upload_result["success"] = True
         
         # Prepare final callback data with complete metadata
-        total_processing_time = time.time() - start_time
+        total_processing_time = time.monotonic() - start_time
         callback_data = {
             "success": True,
             "message": f"Video processing completed successfully. Extracted {len(frames_info)} frames.",
@@ -351,14 +486,18 @@ def process_video_task(
             "file_id": file_id,
             "file_name": file_name,
             "frames_extracted": len(frames_info),
-            "frames_info": frames_info,
             "output_directory": output_dir,
             "processing_time": round(total_processing_time, 2),
             "extraction_time": extraction_result.get("processing_time", 0),
-            "download_time": round(extraction_result.get("processing_time", 0) - total_processing_time, 2),
+            "download_time": round(download_time, 2),
             "file_already_existed": file_already_exists and not force_download
         }
         
+        # Always describe the frames through the manifest; the full list is inlined only if configured
+        callback_data["frames_manifest"] = frames_manifest
+        if INLINE_FRAMES_INFO:
+            callback_data["frames_info"] = frames_info
+        
         # Include scene metadata if available
         if "scene_metadata" in extraction_result:
             callback_data['scene_metadata'] = extraction_result["scene_metadata"]
@@ -369,16 +508,13 @@ def process_video_task(
         
         # Include video info if available
         if "video_info" in extraction_result:
-            try:
-                callback_data['video_info'] = json.loads(extraction_result["video_info"]) if extraction_result["video_info"] else None
-            except:
-                callback_data['video_info'] = extraction_result["video_info"]
+            callback_data['video_info'] = extraction_result["video_info"]
         
-        # Include a sample of ffmpeg output 
+        # Include a sample of ffmpeg output (already capped by the processor)
         if "ffmpeg_output" in extraction_result:
             callback_data['ffmpeg_output'] = {
-                'stdout_sample': extraction_result["ffmpeg_output"].get('stdout', '')[:500],
-                'stderr_sample': extraction_result["ffmpeg_output"].get('stderr', '')[:500]
+                'stdout_sample': extraction_result["ffmpeg_output"].get('stdout', ''),
+                'stderr_sample': extraction_result["ffmpeg_output"].get('stderr', '')
             }
         
         # Prepare for file deletion if needed
@@ -387,37 +523,53 @@ def process_video_task(
         
         # Only delete the file if delete_after_processing is True
         if delete_after_processing:
-            logger.info(f"Deleting video file after successful processing: {download_path}")
+            logger.info("Deleting video file after successful processing: %s", download_path)
             try:
-                os.remove(download_path)
-                logger.info(f"Successfully deleted video file: {download_path}")
+                # Unlinking a multi-GB file can take a while on some filesystems
+                await loop.run_in_executor(None, os.remove, download_path)
+                logger.info("Successfully deleted video file: %s", download_path)
+                file_deleted = True
+            except FileNotFoundError:
+                # Nothing to delete; no separate existence check before the unlink
+                logger.info("Video file already removed: %s", download_path)
                 file_deleted = True
             except Exception as e:
-                logger.error(f"Failed to delete video file {download_path}: {str(e)}")
+                logger.error("Failed to delete video file %s: %s", download_path, e)
                 deletion_error = str(e)
+        elif DROP_VIDEO_PAGE_CACHE and hasattr(os, "posix_fadvise"):
+            try:
+                await loop.run_in_executor(None, drop_page_cache, download_path)
+            except OSError as e:
+                logger.warning("Could not drop page cache for %s: %s", download_path, e)
         
         # Include file deletion info in the main callback
         callback_data["file_deleted"] = file_deleted
         if deletion_error:
             callback_data["deletion_error"] = deletion_error
         
-        # STEP 1: Send the comprehensive data webhook (for Airtable)
-        logger.info(f"Processing complete for file {file_name}. Sending data to Airtable.")
-        frame_analysis_url = os.environ.get("FRAME_ANALYSIS_WEBHOOK_URL", "http://localhost:5678/webhook/9268d2b1-e4de-421e-9685-4c5aa5e79289")
-        logger.info(f"===== SENDING AIRTABLE DATA WEBHOOK =====")
-        logger.info(f"Sending comprehensive data to Airtable webhook: {frame_analysis_url}")
-        
-        # Include additional fields needed for Airtable
-        airtable_callback_data = {**callback_data}
-        airtable_callback_data["webhookUrl"] = frame_analysis_url
-        airtable_callback_data["executionMode"] = "production"
-        
-        # Send webhook to Airtable
-        airtable_result = send_callback(frame_analysis_url, airtable_callback_data)
+        # STEP 1: Send the comprehensive data webhook (for Airtable) and the original callback
+        frame_analysis_url = FRAME_ANALYSIS_WEBHOOK_URL
+        logger.info("===== SENDING AIRTABLE DATA WEBHOOK ===== processing complete for %s, sending data to %s", file_name, frame_analysis_url)
+        
+        # Include additional fields needed for Airtable. The two posts below run concurrently,
+        # so Airtable gets its own top-level dict; frames_info and the rest are shared, not copied.
+        airtable_callback_data = {**callback_data, "webhookUrl": frame_analysis_url, "executionMode": "production"}
+        
+        # Send webhook to Airtable, and the original callback alongside it if it is a different URL.
+        # The original callback does not depend on Airtable, so it is not held back by the wait below.
+        send_original_callback = callback_url and callback_url != frame_analysis_url and callback_url != FRAME_PROCESSOR_WEBHOOK_URL
+        if send_original_callback:
+            logger.info("Sending callback to original callback URL: %s", callback_url)
+            airtable_result, _ = await asyncio.gather(
+                send_callback(frame_analysis_url, airtable_callback_data),
+                send_callback(callback_url, callback_data)
+            )
+        else:
+            airtable_result = await send_callback(frame_analysis_url, airtable_callback_data)
         if airtable_result:
-            logger.info(f"Airtable webhook sent successfully!")
+            logger.info("Airtable webhook sent successfully!")
         else:
-            logger.error(f"Failed to send Airtable webhook!")
+            logger.error("Failed to send Airtable webhook!")
         
         # Set webhook_sent for error handling
         webhook_sent = True
@@ -425,15 +577,11 @@ def process_video_task(
         # STEP 2: Wait to allow Airtable to process the data - scaled based on frame count
         frame_count = len(frames_info)
         # Calculate wait time: configurable seconds per frame with configurable min/max values
-        delay_min = int(os.getenv("WEBHOOK_DELAY_MIN", "15"))
-        delay_per_frame = float(os.getenv("WEBHOOK_DELAY_PER_FRAME", "0.75"))
-        delay_max = int(os.getenv("WEBHOOK_DELAY_MAX", "300"))
-        wait_time_seconds = max(delay_min, min(round(frame_count * delay_per_frame), delay_max))
+        wait_time_seconds = max(WEBHOOK_DELAY_MIN, min(round(frame_count * WEBHOOK_DELAY_PER_FRAME), WEBHOOK_DELAY_MAX))
         
-        logger.info(f"===== WAITING {wait_time_seconds} SECONDS BEFORE SENDING FRAME PROCESSOR WEBHOOK =====")
-        logger.info(f"Waiting {wait_time_seconds} seconds to allow Airtable to process {frame_count} frames (0.75s per frame)...")
-        time.sleep(wait_time_seconds)
-        logger.info(f"Wait complete. Proceeding to send frame processor webhook.")
+        logger.info("===== WAITING %s SECONDS BEFORE SENDING FRAME PROCESSOR WEBHOOK ===== (%s frames at %ss per frame)",
+                    wait_time_seconds, frame_count, WEBHOOK_DELAY_PER_FRAME)
+        await asyncio.sleep(wait_time_seconds)
         
         # STEP 3: Only send the frame processor webhook if Google Drive upload was successful
         upload_verification_passed = (
@@ -445,8 +593,6 @@ def process_video_task(
         
         if upload_verification_passed:
             # Send additional webhook notification for successful frame uploads
-            frame_processor_url = os.environ.get("FRAME_PROCESSOR_WEBHOOK_URL", "http://localhost:5678/webhook/c9af1341-63b6-43fa-a5fc-c7fefc6ab732")
-            drive_success_webhook_url = frame_processor_url
             drive_webhook_data = {
                 "folder_name": drive_upload_result.get('folder_name'),
                 "frame_count": len(frames_info),
@@ -459,48 +605,144 @@ def process_video_task(
                 "success": True
             }
             
-            logger.info(f"===== SENDING FRAME PROCESSOR WEBHOOK =====")
-            logger.info(f"Sending Google Drive upload success webhook to: {drive_success_webhook_url}")
-            logger.info(f"Webhook payload: {json.dumps(drive_webhook_data, indent=2)}")
-            webhook_result = send_callback(drive_success_webhook_url, drive_webhook_data)
+            logger.info("===== SENDING FRAME PROCESSOR WEBHOOK ===== to %s", FRAME_PROCESSOR_WEBHOOK_URL)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Webhook payload: %s", orjson.dumps(drive_webhook_data, option=orjson.OPT_INDENT_2).decode())
+            webhook_result = await send_callback(FRAME_PROCESSOR_WEBHOOK_URL, drive_webhook_data)
             if webhook_result:
-                logger.info(f"Frame processor webhook sent successfully!")
+                logger.info("Frame processor webhook sent successfully!")
             else:
-                logger.error(f"Failed to send frame processor webhook!")
+                logger.error("Failed to send frame processor webhook!")
         else:
             logger.warning("===== SKIPPING FRAME PROCESSOR WEBHOOK =====")
             if not drive_upload_result:
                 logger.warning("Reason: No drive upload result available")
             elif not drive_upload_result.get('success', False):
-                logger.warning(f"Reason: Drive upload was not successful - {drive_upload_result.get('error', drive_upload_result.get('warning', 'Unknown error'))}")
+                logger.warning("Reason: Drive upload was not successful - %s", drive_upload_result.get('error', drive_upload_result.get('warning', 'Unknown error')))
             else:
-                logger.warning(f"Reason: Upload verification failed - {drive_upload_result.get('frames_uploaded', 0)}/{drive_upload_result.get('total_frames', 0)} frames uploaded")
-        
-        # STEP 4: Send callback to original callback URL if provided
-        if callback_url and callback_url != frame_analysis_url and callback_url != drive_success_webhook_url:
-            logger.info(f"Sending callback to original callback URL: {callback_url}")
-            send_callback(callback_url, callback_data)
+                logger.warning("Reason: Upload verification failed - %s/%s frames uploaded", drive_upload_result.get('frames_uploaded', 0), drive_upload_result.get('total_frames', 0))
         
     except Exception as e:
-        logger.exception(f"Error in background processing: {str(e)}")
+        logger.exception("Error in background processing: %s", e)
         if not webhook_sent:
             try:
-                send_callback(callback_url, {
+                await send_callback(callback_url, {
                     "success": False,
                     "message": f"Error during video processing: {str(e)}",
                     "error": str(e),
                     "process_id": process_id,
                     "file_id": file_id,
                     "file_name": file_name,
-                    "processing_time": time.time() - start_time
+                    "processing_time": time.monotonic() - start_time
                 })
                 webhook_sent = True
             except Exception as callback_error:
-                logger.error(f"Failed to send error callback: {str(callback_error)}")
+                logger.error("Failed to send error callback: %s", callback_error)
+
+def download_from_drive(operation_type: str, file_id: str, destination_path: str) -> Tuple[bool, str]:
+    """Download a Drive file with the given account's credentials, on the calling thread"""
+    return GoogleDriveService(operation_type=operation_type).download_file(file_id, destination_path)
+
+def get_file_size(path: str) -> Optional[int]:
+    """Return the file's size, or None if it does not exist"""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return None
+
+def drop_page_cache(path: str):
+    """Tell the kernel a file's cached pages will not be needed again"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def list_frames_info(output_dir: str) -> List[Dict[str, Any]]:
+    """List extracted frames in name order in one directory sweep, with sizes from the DirEntry"""
+    with os.scandir(output_dir) as it:
+        frame_entries = [e for e in it if is_frame_file(e.name)]
+    frame_entries.sort(key=lambda e: e.name)
+    return [
+        {"filename": e.name, "path": e.path, "size_bytes": e.stat().st_size}
+        for e in frame_entries
+    ]
+
+def extract_and_publish_frames(processor: VideoProcessor, video_path: str, output_dir: str,
+                               **kwargs) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Run the streaming extraction and upload, then add frames_info and the frames manifest
+    to the result. Both steps run on one thread, so the manifest upload reuses the Drive
+    client the extraction built for it.
+    """
+    success, result = processor.extract_frames_with_streaming_upload(video_path, output_dir, **kwargs)
+    if success:
+        # The extractor lists the frames it wrote; scan the directory only if no list came back
+        if result.get("frames_info") is None:
+            result["frames_info"] = list_frames_info(output_dir)
+        result["frames_manifest"] = publish_frames_manifest(output_dir, result["frames_info"], result.get("folder_id"))
+    return success, result
+
+def publish_frames_manifest(output_dir: str, frames_info: List[Dict[str, Any]], folder_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Write frames_info as a JSON Lines manifest and, if UPLOAD_FRAMES_MANIFEST is set,
+    upload it to the frames' Drive folder
+    """
+    manifest_path = os.path.join(output_dir, FRAMES_MANIFEST_NAME)
+    with open(manifest_path, "wb") as f:
+        f.writelines(orjson.dumps(frame, option=orjson.OPT_APPEND_NEWLINE) for frame in frames_info)
+    
+    manifest = {
+        "count": len(frames_info),
+        "total_bytes": sum(frame["size_bytes"] for frame in frames_info),
+        "first": frames_info[0]["filename"] if frames_info else None,
+        "last": frames_info[-1]["filename"] if frames_info else None,
+        "path": manifest_path,
+        "url": None
+    }
+    
+    if folder_id and UPLOAD_FRAMES_MANIFEST:
+        try:
+            # Same thread as the extraction, so this returns its cached upload client
+            uploaded = GoogleDriveService(operation_type="upload").upload_file(manifest_path, folder_id, "application/x-ndjson")
+            manifest["url"] = uploaded["url"]
+        except Exception as e:
+            logger.error("Failed to upload frames manifest %s: %s", manifest_path, e)
+    return manifest
+
+async def deliver_frame_batches(queue: asyncio.Queue, webhook_url: str, process_id: str, file_id: str):
+    """
+    Post frame batches from the queue until the None sentinel, then post a final marker
+    """
+    batch_index = 0
+    while True:
+        frames = await queue.get()
+        payload = {"process_id": process_id, "file_id": file_id, "batch_index": batch_index}
+        if frames is None:
+            payload.update({"final": True, "batch_count": batch_index})
+        else:
+            payload.update({"final": False, "frames": frames})
+        # Posted directly rather than via send_callback, which deduplicates by process_id
+        try:
+            response = await get_callback_client().post(
+                webhook_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
+            if response.status_code >= 300:
+                logger.warning("Frame batch %s for %s got status %s", batch_index, process_id, response.status_code)
+        except Exception as e:
+            logger.error("Failed to send frame batch %s for %s: %s", batch_index, process_id, e)
+        if frames is None:
+            return
+        batch_index += 1
 
-def send_callback(callback_url: str, data: dict) -> bool:
+async def send_callback(callback_url: str, data: dict, dead_letter: bool = True) -> bool:
     """
     Send callback with proper error handling and logging
+    
+    With dead_letter set, a callback that fails with a retryable error on every attempt
+    is saved to CALLBACK_DEAD_LETTER_DIR for redelivery.
     """
     if not callback_url:
         logger.warning("No callback URL provided. Skipping callback.")
@@ -508,51 +750,160 @@ def send_callback(callback_url: str, data: dict) -> bool:
     
     # Check for process_id to deduplicate webhooks
     # Skip deduplication for Airtable and frame processor webhooks
-    frame_analysis_url = os.environ.get("FRAME_ANALYSIS_WEBHOOK_URL", "http://localhost:5678/webhook/9268d2b1-e4de-421e-9685-4c5aa5e79289")
-    frame_processor_url = os.environ.get("FRAME_PROCESSOR_WEBHOOK_URL", "http://localhost:5678/webhook/c9af1341-63b6-43fa-a5fc-c7fefc6ab732")
-    
-    is_airtable_webhook = frame_analysis_url and frame_analysis_url in callback_url
-    is_frame_processor_webhook = frame_processor_url and frame_processor_url in callback_url
+    is_airtable_webhook = FRAME_ANALYSIS_WEBHOOK_URL and FRAME_ANALYSIS_WEBHOOK_URL in callback_url
+    is_frame_processor_webhook = FRAME_PROCESSOR_WEBHOOK_URL and FRAME_PROCESSOR_WEBHOOK_URL in callback_url
     
     process_id = data.get("process_id")
-    if process_id and process_id in webhook_sent_tracker and not is_airtable_webhook and not is_frame_processor_webhook:
-        logger.info(f"Webhook already sent for process {process_id}, skipping duplicate")
+    if process_id and webhook_already_sent(process_id) and not is_airtable_webhook and not is_frame_processor_webhook:
+        logger.info("Webhook already sent for process %s, skipping duplicate", process_id)
         return True
         
-    logger.info(f"Sending callback to: {callback_url}")
     
-    # Debugging: log a subset of the payload (without large fields like frames_info)
-    debug_data = {k: v for k, v in data.items() if k not in ['frames_info', 'scene_metadata', 'ffmpeg_output']}
-    logger.info(f"Callback payload summary: {json.dumps(debug_data, indent=2)}")
+    # Debugging: log a subset of the payload (without large fields like frames_info).
+    # Only built at DEBUG so INFO runs skip the second serialization pass.
+    if logger.isEnabledFor(logging.DEBUG):
+        debug_data = {k: v for k, v in data.items() if k not in ['frames_info', 'scene_metadata', 'ffmpeg_output']}
+        logger.debug("Callback payload summary: %s", orjson.dumps(debug_data, option=orjson.OPT_INDENT_2).decode())
+    
+    # Fail fast while the receiving host is known to be down
+    host = urlsplit(callback_url).netloc
+    if callback_circuit_open(host):
+        logger.warning("Circuit open for %s after %s consecutive failures; not sending callback to %s",
+                       host, callback_breaker_state[host][0], callback_url)
+        if dead_letter:
+            await save_dead_letter(callback_url, data)
+        return False
+    
+    # The same body and Idempotency-Key go out on every attempt, so receivers can drop repeats
+    body = orjson.dumps(data)
+    headers = {"Content-Type": "application/json"}
+    if CALLBACK_GZIP and len(body) >= CALLBACK_GZIP_MIN_BYTES:
+        # Large frames_info / scene_metadata payloads compress well; done off the event loop
+        body = await asyncio.get_event_loop().run_in_executor(None, gzip.compress, body, 6)
+        headers["Content-Encoding"] = "gzip"
+    if process_id:
+        headers["Idempotency-Key"] = str(process_id)
     
     try:
-        logger.info(f"Starting HTTP POST request to {callback_url}")
-        response = requests.post(
-            callback_url,
-            json=data,
-            headers={"Content-Type": "application/json"},
-            timeout=float(os.getenv("REQUEST_TIMEOUT", "300"))
-        )
+        # Retry connection errors, 429 and 5xx with jittered exponential backoff
+        for attempt in range(CALLBACK_MAX_TRIES):
+            logger.debug("Starting HTTP POST request to %s (attempt %s)", callback_url, attempt + 1)
+            try:
+                response = await get_callback_client().post(callback_url, content=body, headers=headers)
+            except httpx.TransportError as e:
+                if attempt == CALLBACK_MAX_TRIES - 1:
+                    raise
+                logger.warning("Callback attempt %s/%s failed: %s", attempt + 1, CALLBACK_MAX_TRIES, e)
+            else:
+                if response.status_code != 429 and response.status_code < 500 or attempt == CALLBACK_MAX_TRIES - 1:
+                    break
+                logger.warning("Callback attempt %s/%s got status %s", attempt + 1, CALLBACK_MAX_TRIES, response.status_code)
+            await asyncio.sleep(min(CALLBACK_RETRY_BASE_DELAY * 2 ** attempt, CALLBACK_RETRY_MAX_DELAY) * random.uniform(0.5, 1.5))
         
+        # Any answer other than 429/5xx shows the host is up
+        record_callback_result(host, response.status_code != 429 and response.status_code < 500)
         if response.status_code >= 200 and response.status_code < 300:
-            logger.info(f"Callback sent successfully. Status: {response.status_code}")
-            logger.info(f"Response body: {response.text[:200]}" + ("..." if len(response.text) > 200 else ""))
+            logger.info("Callback sent successfully to %s. Status: %s", callback_url, response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Response body: %s%s", response.text[:200], "..." if len(response.text) > 200 else "")
             # Track that we've sent a webhook for this process
             if process_id and not is_airtable_webhook and not is_frame_processor_webhook:
-                webhook_sent_tracker[process_id] = True
+                with webhook_tracker_lock:
+                    webhook_sent_tracker[process_id] = time.monotonic()
+                    webhook_sent_tracker.move_to_end(process_id)
+                    if len(webhook_sent_tracker) > WEBHOOK_TRACKER_MAX_ENTRIES:
+                        webhook_sent_tracker.popitem(last=False)
             return True
         else:
-            logger.warning(f"Callback received non-success response: {response.status_code}")
-            logger.warning(f"Response: {response.text[:500]}")
-            logger.warning(f"Request URL: {callback_url}")
-            logger.warning(f"Request headers: {{'Content-Type': 'application/json'}}")
+            logger.warning("Callback to %s received non-success response: %s (headers %s). Response: %s",
+                           callback_url, response.status_code, headers, response.text[:500])
+            # Other 4xx responses will not succeed on a resend
+            if dead_letter and (response.status_code == 429 or response.status_code >= 500):
+                await save_dead_letter(callback_url, data)
             return False
             
     except Exception as e:
-        logger.error(f"Failed to send callback: {str(e)}")
-        logger.error(f"Callback URL: {callback_url}")
-        logger.error(f"Error type: {type(e).__name__}")
+        logger.error("Failed to send callback to %s: %s: %s", callback_url, type(e).__name__, e)
+        if isinstance(e, httpx.TransportError):
+            record_callback_result(host, False)
+            if dead_letter:
+                await save_dead_letter(callback_url, data)
+        return False
+
+def callback_circuit_open(host: str) -> bool:
+    """
+    Check whether callbacks to host are paused. Once the cooldown passes, one send is let
+    through as a trial and the cooldown restarts, so concurrent sends stay paused until the
+    trial's result is recorded (or the next cooldown passes)
+    """
+    failures, last_failure = callback_breaker_state.get(host, (0, 0.0))
+    if failures < CALLBACK_BREAKER_FAIL_MAX:
         return False
+    now = time.monotonic()
+    if now - last_failure < CALLBACK_BREAKER_RESET_TIMEOUT:
+        return True
+    callback_breaker_state[host] = (failures, now)
+    return False
+
+def record_callback_result(host: str, ok: bool):
+    """Reset the host's failure count on success, or count one more failure"""
+    if ok:
+        callback_breaker_state.pop(host, None)
+        return
+    failures = callback_breaker_state.get(host, (0, 0.0))[0] + 1
+    callback_breaker_state[host] = (failures, time.monotonic())
+    if failures == CALLBACK_BREAKER_FAIL_MAX:
+        logger.error("Opening circuit for %s for %ss after %s consecutive callback failures",
+                     host, CALLBACK_BREAKER_RESET_TIMEOUT, failures)
+
+def write_dead_letter(callback_url: str, data: dict) -> Optional[str]:
+    """Write a failed callback as gzipped JSON to the dead-letter directory"""
+    os.makedirs(CALLBACK_DEAD_LETTER_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d%H%M%S')}-{data.get('process_id') or 'callback'}-{uuid.uuid4().hex[:8]}.json.gz"
+    path = os.path.join(CALLBACK_DEAD_LETTER_DIR, name)
+    # Written under a temporary name so the redelivery sweep never reads a partial file
+    with open(path + ".tmp", "wb") as f:
+        f.write(gzip.compress(orjson.dumps({"url": callback_url, "data": data})))
+    os.replace(path + ".tmp", path)
+    return path
+
+async def save_dead_letter(callback_url: str, data: dict):
+    """Keep a failed callback for redelivery, if a dead-letter directory is configured"""
+    if not CALLBACK_DEAD_LETTER_DIR:
+        return
+    try:
+        path = await asyncio.get_event_loop().run_in_executor(None, write_dead_letter, callback_url, data)
+        logger.warning("Saved undelivered callback to %s for redelivery", path)
+    except Exception as e:
+        logger.error("Failed to save undelivered callback to %s: %s", CALLBACK_DEAD_LETTER_DIR, e)
+
+def read_dead_letters() -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Load the saved callbacks, oldest first, as (path, url, data)"""
+    try:
+        names = sorted(n for n in os.listdir(CALLBACK_DEAD_LETTER_DIR) if n.endswith(".json.gz"))
+    except FileNotFoundError:
+        return []
+    letters = []
+    for name in names:
+        path = os.path.join(CALLBACK_DEAD_LETTER_DIR, name)
+        try:
+            with open(path, "rb") as f:
+                letter = orjson.loads(gzip.decompress(f.read()))
+            letters.append((path, letter["url"], letter["data"]))
+        except Exception as e:
+            logger.error("Skipping unreadable dead letter %s: %s", path, e)
+    return letters
+
+async def redeliver_dead_letters_periodically():
+    """Resend saved callbacks every CALLBACK_REDELIVERY_INTERVAL, removing each one once delivered"""
+    loop = asyncio.get_event_loop()
+    while True:
+        await asyncio.sleep(CALLBACK_REDELIVERY_INTERVAL)
+        for path, callback_url, data in await loop.run_in_executor(None, read_dead_letters):
+            # Not saved again on failure; the file stays in place for the next sweep
+            if await send_callback(callback_url, data, dead_letter=False):
+                logger.info("Redelivered callback from %s", path)
+                await loop.run_in_executor(None, os.remove, path)
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
@@ -561,18 +912,22 @@ async def health_check() -> HealthResponse:
     """
     return HealthResponse(status="healthy")
 
+def webhook_already_sent(process_id: str) -> bool:
+    """Check the tracker for an unexpired entry, so lookups honour the TTL between prunes"""
+    with webhook_tracker_lock:
+        sent_at = webhook_sent_tracker.get(process_id)
+    return sent_at is not None and time.monotonic() - sent_at < WEBHOOK_TRACKER_TTL
+
 def cleanup_webhook_tracker():
-    """Remove entries older than 1 hour from the webhook tracker"""
-    current_time = time.time()
-    keys_to_remove = []
-    
-    for process_id in webhook_sent_tracker:
-        try:
-            timestamp = int(process_id.split('_')[0])
-            if current_time - timestamp > 3600:  # 1 hour
-                keys_to_remove.append(process_id)
-        except:
-            pass
-    
-    for key in keys_to_remove:
-        del webhook_sent_tracker[key] 
\ No newline at end of file
+    """Remove entries older than WEBHOOK_TRACKER_TTL from the webhook tracker"""
+    cutoff = time.monotonic() - WEBHOOK_TRACKER_TTL
+    with webhook_tracker_lock:
+        # Entries are kept in send order, so expired ones are all at the front
+        while webhook_sent_tracker and next(iter(webhook_sent_tracker.values())) < cutoff:
+            webhook_sent_tracker.popitem(last=False)
+
+async def prune_webhook_tracker_periodically():
+    """Prune the webhook tracker every WEBHOOK_TRACKER_PRUNE_INTERVAL for the life of the app"""
+    while True:
+        await asyncio.sleep(WEBHOOK_TRACKER_PRUNE_INTERVAL)
+        cleanup_webhook_tracker()
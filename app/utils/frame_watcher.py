@@ -3,17 +3,28 @@ Frame file watcher that monitors directories for new frame files
 """
 import os
 import time
+import fnmatch
 import threading
 import logging
-from typing import Callable, Set
+from typing import Callable, List, Set
 from pathlib import Path
-from dotenv import load_dotenv
+from app.config import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
 logger = logging.getLogger(__name__)
 
+# Optional inotify notifications (pip install watchdog); Linux only, polling is used otherwise
+try:
+    from watchdog.events import PatternMatchingEventHandler
+    from watchdog.observers.inotify import InotifyObserver
+except Exception:
+    InotifyObserver = None
+
+FRAME_WATCHER_POLL_INTERVAL = float(os.getenv("FRAME_WATCHER_POLL_INTERVAL", "0.5"))
+FRAME_WATCHER_STABILITY_TIME = float(os.getenv("FRAME_WATCHER_STABILITY_TIME", "0.2"))
+
 class FrameWatcher:
     """Watches a directory for new frame files and triggers callbacks"""
     
@@ -22,14 +33,16 @@ class FrameWatcher:
         self.watch_dir = Path(watch_dir)
         self.callback = callback
         self.file_pattern = file_pattern
-        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("FRAME_WATCHER_POLL_INTERVAL", "0.5"))
+        self.poll_interval = poll_interval if poll_interval is not None else FRAME_WATCHER_POLL_INTERVAL
         
-        # Track processed files
+        # Track processed files. The lock makes check-and-add atomic between the watch
+        # thread's scan and the inotify observer thread, which can report the same frame.
         self.processed_files: Set[str] = set()
         self.processed_lock = threading.Lock()
         
-        # Watcher thread
+        # Watcher thread, plus the inotify observer when available
         self.watcher_thread = None
+        self.observer = None
         self.stop_event = threading.Event()
         
     def start(self):
@@ -39,6 +52,8 @@ class FrameWatcher:
             return
         
         if self.watcher_thread is None or not self.watcher_thread.is_alive():
+            if InotifyObserver is not None and self.observer is None:
+                self._start_observer()
             self.watcher_thread = threading.Thread(target=self._watch_loop, daemon=True)
             self.watcher_thread.start()
             logger.info(f"Started watching directory: {self.watch_dir}")
@@ -47,10 +62,47 @@ class FrameWatcher:
         """Stop watching the directory"""
         logger.info("Stopping frame watcher...")
         self.stop_event.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join(timeout=5)
+            self.observer = None
         if self.watcher_thread and self.watcher_thread.is_alive():
             self.watcher_thread.join(timeout=5)
         logger.info("Frame watcher stopped")
     
+    def _start_observer(self):
+        """Subscribe to close-after-write and rename events so new frames need no polling"""
+        watcher = self
+        
+        class FrameEventHandler(PatternMatchingEventHandler):
+            def on_closed(self, event):
+                # IN_CLOSE_WRITE: the writer has finished, so the file is complete
+                watcher._notify_ready(event.src_path)
+            
+            def on_moved(self, event):
+                watcher._notify_ready(event.dest_path)
+        
+        try:
+            observer = InotifyObserver()
+            observer.schedule(FrameEventHandler(patterns=[self.file_pattern], ignore_directories=True),
+                              str(self.watch_dir), recursive=False)
+            observer.start()
+            self.observer = observer
+            logger.info(f"Using inotify notifications for {self.watch_dir}")
+        except Exception as e:
+            logger.warning(f"inotify unavailable, falling back to polling: {str(e)}")
+            self.observer = None
+    
+    def _notify_ready(self, file_path: str):
+        """Hand a completed frame to the callback unless it was already reported"""
+        if not fnmatch.fnmatchcase(os.path.basename(file_path), self.file_pattern):
+            return
+        with self.processed_lock:
+            if file_path in self.processed_files:
+                return
+            self.processed_files.add(file_path)
+        self.callback(file_path, os.path.basename(file_path))
+    
     def _watch_loop(self):
         """Main watch loop that monitors for new files"""
         logger.info(f"Frame watcher started for pattern: {self.file_pattern}")
@@ -58,6 +110,11 @@ class FrameWatcher:
         # Process any existing files first
         self._scan_directory()
         
+        if self.observer is not None:
+            # inotify reports new frames from here on; nothing to poll
+            self.stop_event.wait()
+            return
+        
         while not self.stop_event.is_set():
             try:
                 self._scan_directory()
@@ -69,20 +126,28 @@ class FrameWatcher:
     def _scan_directory(self):
         """Scan directory for new frame files"""
         try:
-            # Get all files matching the pattern
-            frame_files = sorted(self.watch_dir.glob(self.file_pattern))
+            # One directory sweep. Known frames are dropped by a set lookup before any pattern
+            # match or sort, so each tick costs O(new files) beyond the readdir itself.
+            processed = self.processed_files
+            with os.scandir(self.watch_dir) as it:
+                frame_entries = [
+                    e for e in it
+                    if e.path not in processed and fnmatch.fnmatchcase(e.name, self.file_pattern)
+                ]
+            if not frame_entries:
+                return
+            frame_entries.sort(key=lambda e: e.name)
             
-            # Batch process new files for efficiency
+            # Check the whole batch for completeness with one shared stability wait,
+            # then claim the ready files under the lock
+            ready_entries = self._ready_entries(frame_entries)
             new_files = []
             
             with self.processed_lock:
-                for file_path in frame_files:
-                    file_str = str(file_path)
-                    if file_str not in self.processed_files:
-                        # Check if file is fully written (size stable)
-                        if self._is_file_ready(file_path):
-                            self.processed_files.add(file_str)
-                            new_files.append((str(file_path), file_path.name))
+                for entry in ready_entries:
+                    if entry.path not in self.processed_files:
+                        self.processed_files.add(entry.path)
+                        new_files.append((entry.path, entry.name))
             
             # Process new files
             if new_files:
@@ -98,34 +163,40 @@ class FrameWatcher:
         except Exception as e:
             logger.error(f"Error scanning directory: {str(e)}")
     
-    def _is_file_ready(self, file_path: Path) -> bool:
-        """Check if a file is fully written and ready for processing"""
-        try:
-            if not file_path.exists() or file_path.stat().st_size == 0:
-                return False
-
-            # Check file size stability
-            size1 = file_path.stat().st_size
-            stability_time = float(os.getenv("FRAME_WATCHER_STABILITY_TIME", "0.2"))
-            time.sleep(stability_time)  # Configurable stability check
-
-            if not file_path.exists():
-                return False
-
-            size2 = file_path.stat().st_size
+    def _ready_entries(self, entries: List[os.DirEntry]) -> List[os.DirEntry]:
+        """Return the entries that are fully written, waiting the stability time once per batch"""
+        first_sizes = {}
+        for entry in entries:
+            try:
+                # A missing file raises FileNotFoundError and is reported as not ready
+                size = os.stat(entry.path).st_size
+            except OSError:
+                continue
+            if size > 0:
+                first_sizes[entry.path] = size
+        if not first_sizes:
+            return []
 
-            # Also check modification time
-            mtime = file_path.stat().st_mtime
-            current_time = time.time()
+        # Check file size stability
+        time.sleep(FRAME_WATCHER_STABILITY_TIME)  # Configurable stability check
 
+        ready = []
+        current_time = time.time()
+        for entry in entries:
+            size1 = first_sizes.get(entry.path)
+            if size1 is None:
+                continue
+            try:
+                # Size and modification time come from the same stat
+                stat2 = os.stat(entry.path)
+            except OSError:
+                continue
             # File must be stable and not modified in last configurable seconds
-            stability_threshold = float(os.getenv("FRAME_WATCHER_STABILITY_TIME", "0.2"))
-            return size1 == size2 and size1 > 0 and (current_time - mtime) > stability_threshold
-
-        except Exception:
-            return False
+            if stat2.st_size == size1 and (current_time - stat2.st_mtime) > FRAME_WATCHER_STABILITY_TIME:
+                ready.append(entry)
+        return ready
     
     def get_processed_count(self) -> int:
         """Get the number of processed files"""
-        with self.processed_lock:
-            return len(self.processed_files)
\ No newline at end of file
+        # len() of a set is atomic under the GIL, so readers need not take the lock
+        return len(self.processed_files)
\ No newline at end of file
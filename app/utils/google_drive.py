@@ -1,26 +1,90 @@
 import os
 import logging
 import io
-import backoff
 import json
 import pickle
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+from googleapiclient.http import DEFAULT_CHUNK_SIZE, MediaIoBaseDownload, MediaFileUpload
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from google.auth.transport.requests import AuthorizedSession, Request
 from typing import Optional, Tuple, Dict, List, Any
 from fastapi import HTTPException, BackgroundTasks
-from dotenv import load_dotenv
+from app.config import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Retry policy for metadata lookups
+METADATA_MAX_TRIES = 3
+METADATA_RETRY_BASE_DELAY = 1.0
+
+# Media downloads stream straight from the HTTP response into the file through one reused buffer
+DRIVE_MEDIA_URL = "https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
+DOWNLOAD_BUFFER_SIZE = 4 * 1024 * 1024  # 4 MB
+# response.raw is read undecoded, so the media must not come back content-encoded
+IDENTITY_ENCODING = {'Accept-Encoding': 'identity'}
+# Bytes per request for the MediaIoBaseDownload fallback (the client library's default unless set)
+GDRIVE_DOWNLOAD_CHUNKSIZE = int(os.getenv("GDRIVE_DOWNLOAD_CHUNKSIZE", str(DEFAULT_CHUNK_SIZE)))
+# Large files can be fetched as parallel byte ranges, each on its own connection (1 = single stream)
+GDRIVE_DOWNLOAD_PARALLELISM = int(os.getenv("GDRIVE_DOWNLOAD_PARALLELISM", "1"))
+DOWNLOAD_RANGE_MIN_SIZE = 32 * 1024 * 1024  # 32 MB
+
+# Per-thread Drive state: built clients keyed by (operation_type, credentials_path, token_path),
+# and AuthorizedSessions for direct media requests kept open so their keep-alive connections are
+# reused. httplib2 and requests sessions are not thread-safe, so each worker thread keeps its own,
+# and they are released with the thread.
+_drive_local = threading.local()
+
+def _thread_cache(name: str) -> Dict[Any, Any]:
+    """Return this thread's cache dict of the given name, creating it on first use"""
+    cache = getattr(_drive_local, name, None)
+    if cache is None:
+        cache = {}
+        setattr(_drive_local, name, cache)
+    return cache
+
+def load_token(token_path: str) -> Credentials:
+    """
+    Load saved OAuth credentials. Tokens are stored as authorized-user JSON; a legacy
+    pickled token is read once and rewritten as JSON.
+    """
+    with open(token_path, 'rb') as f:
+        data = f.read()
+    if data[:1] == b'\x80':  # Pickle protocol 2+ header
+        creds = pickle.loads(data)
+        save_token(creds, token_path)
+        logger.info(f"Migrated pickled OAuth token at {token_path} to JSON")
+        return creds
+    return Credentials.from_authorized_user_info(json.loads(data))
+
+def save_token(creds: Credentials, token_path: str):
+    """Save OAuth credentials as authorized-user JSON"""
+    with open(token_path, 'w') as f:
+        f.write(creds.to_json())
+
+def preallocate(fd: int, size: int):
+    """Reserve a download's blocks in one allocation, where the platform and filesystem support it"""
+    if not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        logger.debug(f"Could not preallocate {size} bytes: {str(e)}")
+
+def build_drive_service(credentials):
+    """Build a Drive v3 client from the bundled discovery document"""
+    return build('drive', 'v3', credentials=credentials, static_discovery=True, cache_discovery=False)
+
 class GoogleDriveService:
     def __init__(self, credentials_path: Optional[str] = None, token_path: Optional[str] = None, operation_type: str = "upload"):
         """
@@ -37,6 +101,7 @@ class GoogleDriveService:
                           - 'download_secondary': Use secondary account credentials for downloads
         """
         self.drive_service = None
+        self.creds = None
         self.operation_type = operation_type
         
         # Determine which set of environment variables to use based on operation type
@@ -79,6 +144,15 @@ class GoogleDriveService:
         if not token_path:
             token_path = default_token
         
+        # Reuse the client this thread already built for the same credentials
+        service_cache = _thread_cache('services')
+        cache_key = (operation_type, credentials_path, token_path)
+        cached = service_cache.get(cache_key)
+        if cached is not None and (cached[0] is None or not cached[0].expired):
+            self.creds, self.drive_service = cached
+            logger.info(f"Reusing cached Google Drive service for {operation_type}")
+            return
+        
         try:
             creds = None
             
@@ -99,12 +173,11 @@ class GoogleDriveService:
             if not creds:
                 # Check if we have a token file
                 if os.path.exists(token_path):
-                    with open(token_path, 'rb') as token:
-                        try:
-                            creds = pickle.load(token)
-                            logger.info(f"Loaded OAuth credentials from token file for {operation_type}")
-                        except Exception as e:
-                            logger.warning(f"Error loading token file: {str(e)}")
+                    try:
+                        creds = load_token(token_path)
+                        logger.info(f"Loaded OAuth credentials from token file for {operation_type}")
+                    except Exception as e:
+                        logger.warning(f"Error loading token file: {str(e)}")
                 
                 # If there are no valid credentials, try to authenticate
                 if not creds or not creds.valid:
@@ -130,9 +203,8 @@ class GoogleDriveService:
                                 logger.info(f"Completed OAuth authentication flow for {operation_type}")
                                 
                                 # Save the credentials for the next run
-                                with open(token_path, 'wb') as token:
-                                    pickle.dump(creds, token)
-                                    logger.info(f"Saved OAuth token to {token_path} for {operation_type}")
+                                save_token(creds, token_path)
+                                logger.info(f"Saved OAuth token to {token_path} for {operation_type}")
                         except Exception as e:
                             logger.error(f"Error during authentication for {operation_type}: {str(e)}")
                             raise
@@ -140,7 +212,8 @@ class GoogleDriveService:
                         logger.warning(f"Credentials file not found at {credentials_path} for {operation_type}")
                         # Try application default credentials as a last resort
                         try:
-                            self.drive_service = build('drive', 'v3', credentials=None)
+                            self.drive_service = build_drive_service(None)
+                            service_cache[cache_key] = (None, self.drive_service)
                             logger.info(f"Using application default credentials for {operation_type}")
                             return
                         except Exception as e:
@@ -148,7 +221,9 @@ class GoogleDriveService:
                             raise
             
             # Create the Drive API client
-            self.drive_service = build('drive', 'v3', credentials=creds)
+            self.creds = creds
+            self.drive_service = build_drive_service(creds)
+            service_cache[cache_key] = (creds, self.drive_service)
             logger.info(f"Successfully initialized Google Drive service for {operation_type}")
             
         except Exception as e:
@@ -166,11 +241,6 @@ class GoogleDriveService:
         except:
             return False
 
-    @backoff.on_exception(
-        backoff.expo,
-        Exception,
-        max_tries=3
-    )
     def get_file_metadata(self, file_id: str) -> Dict:
         """
         Get metadata for a file in Google Drive with retry logic
@@ -181,17 +251,58 @@ class GoogleDriveService:
         Returns:
             Dictionary with file metadata
         """
+        for attempt in range(METADATA_MAX_TRIES):
+            try:
+                logger.info(f"Getting metadata for file ID: {file_id}")
+                file_metadata = self.drive_service.files().get(
+                    fileId=file_id, 
+                    fields='id, name, mimeType, size, modifiedTime, createdTime'
+                ).execute()
+                logger.info(f"Retrieved metadata for file: {file_metadata.get('name', 'Unknown')} ({file_metadata.get('mimeType', 'unknown type')})")
+                return file_metadata
+            except Exception as e:
+                logger.exception(f"Error getting file metadata for file ID {file_id}: {str(e)}")
+                if attempt == METADATA_MAX_TRIES - 1:
+                    raise
+                time.sleep(METADATA_RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def get_files_metadata(self, file_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get metadata for several files in one Drive batch request
+        
+        Args:
+            file_ids: IDs of the files in Google Drive (at most 100 per batch)
+            
+        Returns:
+            Dictionary mapping each file ID to its metadata, or to the exception raised for it
+        """
+        results: Dict[str, Any] = {}
+        
+        def on_response(request_id, response, exception):
+            results[request_id] = exception if exception is not None else response
+        
+        batch = self.drive_service.new_batch_http_request(callback=on_response)
+        for file_id in dict.fromkeys(file_ids):
+            batch.add(
+                self.drive_service.files().get(
+                    fileId=file_id,
+                    fields='id, name, mimeType, size, modifiedTime, createdTime'
+                ),
+                request_id=file_id
+            )
+        
         try:
-            logger.info(f"Getting metadata for file ID: {file_id}")
-            file_metadata = self.drive_service.files().get(
-                fileId=file_id, 
-                fields='id, name, mimeType, size, modifiedTime, createdTime'
-            ).execute()
-            logger.info(f"Retrieved metadata for file: {file_metadata.get('name', 'Unknown')} ({file_metadata.get('mimeType', 'unknown type')})")
-            return file_metadata
+            logger.info(f"Getting metadata for {len(set(file_ids))} files in one batch")
+            batch.execute()
         except Exception as e:
-            logger.exception(f"Error getting file metadata for file ID {file_id}: {str(e)}")
-            raise
+            # The batch itself failed, so fall back to individual lookups with their own retries
+            logger.warning(f"Metadata batch failed, retrying files individually: {str(e)}")
+            for file_id in dict.fromkeys(file_ids):
+                try:
+                    results[file_id] = self.get_file_metadata(file_id)
+                except Exception as file_error:
+                    results[file_id] = file_error
+        return results
 
     def download_file(self, file_id: str, destination_path: str) -> Tuple[bool, str]:
         """
@@ -208,11 +319,17 @@ class GoogleDriveService:
             logger.info(f"Starting download for file ID: {file_id}")
             logger.info(f"Destination path: {destination_path}")
             
-            # First get the file metadata to get the filename if needed
-            file_metadata = self.get_file_metadata(file_id)
-            
             # Generate the full path where we'll save the file
             file_name = os.path.basename(destination_path)
+            
+            # Metadata is one extra round trip before any bytes flow. The single-stream download
+            # takes the size from Content-Length, so it is only fetched for a missing file name,
+            # the ranged download or the client-library fallback
+            parallel = self.creds is not None and GDRIVE_DOWNLOAD_PARALLELISM > 1 and hasattr(os, 'pwrite')
+            file_metadata = {}
+            if not file_name or parallel or self.creds is None:
+                file_metadata = self.get_file_metadata(file_id)
+            
             if not file_name:  # If destination_path is a directory or ends with '/'
                 file_name = file_metadata['name']
                 destination_path = os.path.join(destination_path, file_name)
@@ -224,26 +341,34 @@ class GoogleDriveService:
             
             # Download the file
             logger.info("Initiating download request")
-            request = self.drive_service.files().get_media(fileId=file_id)
-            
-            with open(destination_path, 'wb') as f:
-                downloader = MediaIoBaseDownload(f, request)
-                done = False
-                download_progress = 0
-                while not done:
-                    status, done = downloader.next_chunk()
-                    new_progress = int(status.progress() * 100)
-                    if new_progress - download_progress >= 20 or new_progress == 100:  # Log every 20% progress
-                        download_progress = new_progress
-                        logger.info(f"Download progress: {download_progress}%")
+            expected_size = int(file_metadata.get('size', 0))
+            if parallel and expected_size >= 2 * DOWNLOAD_RANGE_MIN_SIZE:
+                self._download_ranges(file_id, destination_path, expected_size)
+            elif self.creds is not None:
+                expected_size = self._stream_media_to_file(file_id, destination_path, expected_size)
+            else:
+                # Application default credentials: fall back to the client library's chunked download
+                request = self.drive_service.files().get_media(fileId=file_id)
+                with open(destination_path, 'wb') as f:
+                    downloader = MediaIoBaseDownload(f, request, chunksize=GDRIVE_DOWNLOAD_CHUNKSIZE)
+                    done = False
+                    download_progress = 0
+                    while not done:
+                        status, done = downloader.next_chunk()
+                        new_progress = int(status.progress() * 100)
+                        if new_progress - download_progress >= 20 or new_progress == 100:  # Log every 20% progress
+                            download_progress = new_progress
+                            logger.info("Download progress: %d%%", download_progress)
             
             # Verify download
-            if os.path.exists(destination_path):
-                file_size = os.path.getsize(destination_path)
+            try:
+                file_size = os.stat(destination_path).st_size
+            except FileNotFoundError:
+                file_size = None
+            if file_size is not None:
                 logger.info(f"File downloaded successfully to {destination_path} ({file_size} bytes)")
                 
-                if 'size' in file_metadata:
-                    expected_size = int(file_metadata['size'])
+                if expected_size:
                     if file_size != expected_size:
                         logger.warning(f"Downloaded file size ({file_size}) doesn't match expected size ({expected_size})")
                     else:
@@ -259,6 +384,92 @@ class GoogleDriveService:
             logger.exception(error_msg)
             return False, error_msg
     
+    def _stream_media_to_file(self, file_id: str, destination_path: str, expected_size: int = 0) -> int:
+        """
+        Stream a file's media into destination_path in one request, reading the response
+        into a single reused buffer instead of buffering whole chunks in memory
+        
+        Returns the expected size, taken from Content-Length when not given (0 if unknown)
+        """
+        buffer = bytearray(DOWNLOAD_BUFFER_SIZE)
+        view = memoryview(buffer)
+        downloaded = 0
+        download_progress = 0
+        session = self._get_authorized_session()
+        with session.get(DRIVE_MEDIA_URL.format(file_id=file_id), headers=IDENTITY_ENCODING, stream=True) as response:
+            response.raise_for_status()
+            if not expected_size:
+                expected_size = int(response.headers.get('Content-Length', 0))
+            with open(destination_path, 'wb') as f:
+                if expected_size:
+                    preallocate(f.fileno(), expected_size)
+                while True:
+                    n = response.raw.readinto(buffer)
+                    if not n:
+                        break
+                    f.write(view[:n])
+                    downloaded += n
+                    if expected_size:
+                        new_progress = downloaded * 100 // expected_size
+                        if new_progress - download_progress >= 20 or new_progress == 100:  # Log every 20% progress
+                            download_progress = new_progress
+                            logger.info("Download progress: %d%%", download_progress)
+                # Trim the reservation if the body came up short, so the size check still sees it
+                f.truncate(downloaded)
+        return expected_size
+    
+    def _get_authorized_session(self) -> AuthorizedSession:
+        """Get this thread's AuthorizedSession for these credentials, creating it on first use"""
+        sessions = _thread_cache('sessions')
+        # Keyed by the credentials object, which the client cache keeps alive and shared
+        cached = sessions.get(id(self.creds))
+        if cached is not None and cached[0] is self.creds:
+            return cached[1]
+        session = AuthorizedSession(self.creds)
+        sessions[id(self.creds)] = (self.creds, session)
+        return session
+
+    def _download_ranges(self, file_id: str, destination_path: str, size: int):
+        """
+        Download a file as up to GDRIVE_DOWNLOAD_PARALLELISM byte ranges fetched concurrently,
+        each written in place with pwrite into a preallocated file
+        """
+        part_size = max(DOWNLOAD_RANGE_MIN_SIZE, -(-size // GDRIVE_DOWNLOAD_PARALLELISM))
+        ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+        url = DRIVE_MEDIA_URL.format(file_id=file_id)
+        logger.info(f"Downloading {size} bytes in {len(ranges)} parallel ranges")
+        
+        def fetch_range(fd: int, start: int, end: int):
+            # One session per range: requests sessions are not safe to share across threads
+            buffer = bytearray(DOWNLOAD_BUFFER_SIZE)
+            view = memoryview(buffer)
+            offset = start
+            with AuthorizedSession(self.creds) as session:
+                with session.get(url, headers={**IDENTITY_ENCODING, 'Range': f"bytes={start}-{end}"}, stream=True) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RuntimeError(f"Range request for bytes {start}-{end} returned status {response.status_code}")
+                    while True:
+                        n = response.raw.readinto(buffer)
+                        if not n:
+                            break
+                        os.pwrite(fd, view[:n], offset)
+                        offset += n
+            if offset != end + 1:
+                raise IOError(f"Range {start}-{end} ended early at byte {offset}")
+            logger.info(f"Downloaded bytes {start}-{end}")
+        
+        fd = os.open(destination_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            # Size the whole file up front so the ranges can land in any order
+            os.ftruncate(fd, size)
+            preallocate(fd, size)
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                for future in [executor.submit(fetch_range, fd, start, end) for start, end in ranges]:
+                    future.result()
+        finally:
+            os.close(fd)
+
     async def download_file_async(self, file_id: str, destination_path: str, background_tasks: Optional[BackgroundTasks] = None) -> Dict:
         """
         Download a file from Google Drive asynchronously or in background
@@ -292,6 +503,28 @@ class GoogleDriveService:
         else:
             raise HTTPException(status_code=500, detail=result)
     
+    def upload_file(self, file_path: str, folder_id: str, mime_type: Optional[str] = None) -> Dict:
+        """
+        Upload a small file to a Google Drive folder in a single request
+        
+        Args:
+            file_path: Local path of the file to upload
+            folder_id: ID of the destination folder
+            mime_type: MIME type of the file (guessed by the client library if omitted)
+            
+        Returns:
+            Dict with the new file's id and view URL
+        """
+        media = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
+        file = self.drive_service.files().create(
+            body={'name': os.path.basename(file_path), 'parents': [folder_id]},
+            media_body=media,
+            fields='id'
+        ).execute()
+        file_id = file.get('id')
+        logger.info(f"Uploaded {file_path} to Drive as {file_id}")
+        return {'id': file_id, 'url': f"https://drive.google.com/file/d/{file_id}/view"}
+
     def list_files(self, query: Optional[str] = None, page_size: int = 10, page_token: Optional[str] = None) -> Dict:
         """
         List files in Google Drive matching optional query
@@ -1,8 +1,10 @@
 import httpx
+import orjson
 import asyncio
 import logging
 import os
-import backoff
+import random
+from collections import Counter, defaultdict
 from typing import Dict, Any, Optional, List, Tuple
 from fastapi import HTTPException
 
@@ -14,10 +16,101 @@ logger = logging.getLogger("gradio-client")
 GRADIO_URL = os.getenv("GRADIO_URL", "http://localhost:7860")
 TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "300"))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10.0"))
+RETRY_STATS_WINDOW = 1000
+HTTPX_MAX_CONNECTIONS = int(os.getenv("HTTPX_MAX_CONNECTIONS", "100"))
+HTTPX_MAX_KEEPALIVE = int(os.getenv("HTTPX_MAX_KEEPALIVE", "40"))
+HTTPX_KEEPALIVE_EXPIRY = float(os.getenv("HTTPX_KEEPALIVE_EXPIRY", "30.0"))
+USE_AIOHTTP_TRANSPORT = os.getenv("USE_AIOHTTP_TRANSPORT", "false").lower() in ("true", "1", "yes")
+
+# Optional aiohttp-backed transport for httpx (pip install httpx-aiohttp)
+try:
+    import aiohttp
+    from httpx_aiohttp import AiohttpTransport
+except ImportError:
+    AiohttpTransport = None
+
+def build_transport() -> Tuple[Optional[httpx.AsyncBaseTransport], Optional["aiohttp.ClientSession"]]:
+    """
+    Return an aiohttp-backed transport and its session when USE_AIOHTTP_TRANSPORT
+    is enabled, otherwise (None, None) so httpx uses its default transport.
+    The caller owns the session and closes it with close_transport_session.
+    """
+    if not USE_AIOHTTP_TRANSPORT:
+        return None, None
+    if AiohttpTransport is None:
+        logger.warning("USE_AIOHTTP_TRANSPORT is set but httpx-aiohttp is not installed, using default transport")
+        return None, None
+    connector = aiohttp.TCPConnector(limit=HTTPX_MAX_CONNECTIONS, keepalive_timeout=HTTPX_KEEPALIVE_EXPIRY)
+    session = aiohttp.ClientSession(connector=connector)
+    return AiohttpTransport(client=session), session
+
+async def close_transport_session(session: Optional["aiohttp.ClientSession"]):
+    """Close the aiohttp session behind an AiohttpTransport so its connector is released"""
+    if session is not None and not session.closed:
+        await session.close()
+
+# Per-fn_index attempt outcomes shared across requests, used to adapt retry delays
+retry_stats: Dict[int, Counter] = defaultdict(Counter)
+
+def next_retry_delay(base: float, previous: float) -> float:
+    """
+    Decorrelated jitter: draw the next sleep from [base, previous * 3], capped at RETRY_MAX_DELAY
+    """
+    return min(RETRY_MAX_DELAY, random.uniform(base, previous * 3))
+
+def initial_retry_delay(stats: Counter) -> float:
+    """
+    Scale the base delay by the recent failure rate of this fn_index so a
+    struggling Gradio backend is backed off harder from the first retry
+    """
+    attempts = stats["success"] + stats["failure"]
+    if not attempts:
+        return RETRY_BASE_DELAY
+    failure_rate = stats["failure"] / attempts
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (1 + 4 * failure_rate))
+
+def record_retry_outcome(stats: Counter, outcome: str):
+    """Count an attempt outcome, halving old counts so the rate tracks recent behaviour"""
+    stats[outcome] += 1
+    if stats["success"] + stats["failure"] > RETRY_STATS_WINDOW:
+        for key in stats:
+            stats[key] //= 2
 
 class GradioClient:
     """Client for interacting with Gradio servers with robust connection handling"""
     
+    # Shared connection pool, created on first use and closed on app shutdown
+    _http_client: Optional[httpx.AsyncClient] = None
+    # aiohttp session behind the transport when USE_AIOHTTP_TRANSPORT is enabled
+    _transport_session = None
+    
+    @classmethod
+    def get_http_client(cls) -> httpx.AsyncClient:
+        """Return the process-wide HTTP client, creating it if needed"""
+        if cls._http_client is None or cls._http_client.is_closed:
+            transport, cls._transport_session = build_transport()
+            cls._http_client = httpx.AsyncClient(
+                transport=transport,
+                timeout=TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTPX_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTPX_MAX_KEEPALIVE,
+                    keepalive_expiry=HTTPX_KEEPALIVE_EXPIRY
+                )
+            )
+        return cls._http_client
+    
+    @classmethod
+    async def aclose(cls):
+        """Close the shared HTTP client and the aiohttp session behind it, if any"""
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            cls._http_client = None
+        await close_transport_session(cls._transport_session)
+        cls._transport_session = None
+    
     @staticmethod
     async def check_health(gradio_url: str = GRADIO_URL) -> Tuple[bool, Dict[str, Any]]:
         """
@@ -50,7 +143,7 @@ class GradioClient:
                     result["details"]["session_status_code"] = session_response.status_code
                     
                     if session_response.status_code == 200:
-                        session_data = session_response.json()
+                        session_data = orjson.loads(session_response.content)
                         result["details"]["session_hash"] = session_data.get("session_hash", "not found")
                         
                         # Try a basic API call with the session
@@ -73,7 +166,7 @@ class GradioClient:
                     result["details"]["config_status_code"] = config_response.status_code
                     
                     if config_response.status_code == 200:
-                        config = config_response.json()
+                        config = orjson.loads(config_response.content)
                         result["details"]["app_version"] = config.get("version", "unknown")
                         result["details"]["components"] = len(config.get("components", []))
                 except Exception as e:
@@ -99,19 +192,14 @@ class GradioClient:
             return False, result
     
     @staticmethod
-    @backoff.on_exception(
-        backoff.expo,
-        (httpx.ConnectError, httpx.TimeoutException),
-        max_tries=MAX_RETRIES
-    )
-    async def fetch_data_with_retry(
+    async def fetch_data(
         client: httpx.AsyncClient, 
         fn_index: int = 0,
         data: List[Any] = None,
         session_hash: Optional[str] = None
-    ) -> Dict[Any, Any]:
+    ) -> Tuple[bytes, str]:
         """
-        Fetch data from Gradio with retry logic
+        Fetch data from Gradio (single attempt), returning the raw body and its content type
         """
         try:
             # First, get a session hash if not provided
@@ -122,14 +210,14 @@ class GradioClient:
                     timeout=TIMEOUT
                 )
                 response.raise_for_status()
-                session_data = response.json()
+                session_data = orjson.loads(response.content)
                 session_hash = session_data.get("session_hash")
                 
                 if not session_hash:
                     logger.error("Failed to get session hash from Gradio")
                     raise HTTPException(status_code=500, detail="Failed to get session hash from Gradio")
             
-            logger.info(f"Using session hash: {session_hash}")
+            logger.info("Using session hash: %s", session_hash)
             
             # Now fetch the actual data
             payload = {
@@ -147,39 +235,53 @@ class GradioClient:
                 timeout=TIMEOUT
             )
             response.raise_for_status()
-            return response.json()
+            return response.content, response.headers.get("content-type", "application/json")
             
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
             raise HTTPException(status_code=e.response.status_code, 
                            detail=f"Gradio server returned error: {e.response.text}")
-        except (httpx.ConnectError, httpx.TimeoutException) as e:
-            logger.error(f"Connection error: {str(e)}")
-            raise HTTPException(status_code=500, detail="All connection attempts failed")
     
     @staticmethod
-    async def get_data(fn_index: int = 0, data: List[Any] = None):
-        """Get data from Gradio with connection handling"""
-        # Create a connection pool for better performance
-        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=10)) as client:
+    async def fetch_data_with_retry(
+        client: httpx.AsyncClient, 
+        fn_index: int = 0,
+        data: List[Any] = None,
+        session_hash: Optional[str] = None
+    ) -> Tuple[bytes, str]:
+        """
+        Fetch data from Gradio, retrying connection errors and timeouts with decorrelated jitter
+        """
+        stats = retry_stats[fn_index]
+        base_delay = delay = initial_retry_delay(stats)
+        
+        for attempt in range(1, MAX_RETRIES + 1):
             try:
-                # Check if Gradio is accessible first
-                logger.info("Checking if Gradio server is accessible")
-                try:
-                    health_check = await client.get(f"{GRADIO_URL}/", timeout=5.0)
-                    if health_check.status_code != 200:
-                        logger.error(f"Gradio server health check failed: {health_check.status_code}")
-                        raise HTTPException(status_code=503, detail="Gradio server is not available")
-                except Exception as e:
-                    logger.error(f"Gradio server health check failed: {str(e)}")
+                result = await GradioClient.fetch_data(client, fn_index, data, session_hash)
+                record_retry_outcome(stats, "success")
+                return result
+            except (httpx.ConnectError, httpx.TimeoutException) as e:
+                record_retry_outcome(stats, "failure")
+                if attempt == MAX_RETRIES:
+                    logger.error(f"Connection error: {str(e)}")
                     raise HTTPException(status_code=503, detail=f"Gradio server is not available: {str(e)}")
-                
-                # Proceed with data fetch
-                return await GradioClient.fetch_data_with_retry(client, fn_index, data)
-                
-            except asyncio.TimeoutError:
-                logger.error("Request to Gradio timed out")
-                raise HTTPException(status_code=504, detail="Request to Gradio timed out")
-            except Exception as e:
-                logger.error(f"Unexpected error: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}") 
\ No newline at end of file
+                delay = next_retry_delay(base_delay, delay)
+                logger.warning("Gradio attempt %d/%d failed (%s), retrying in %.2fs", attempt, MAX_RETRIES, e, delay)
+                await asyncio.sleep(delay)
+    
+    @staticmethod
+    async def get_data(fn_index: int = 0, data: List[Any] = None) -> Tuple[bytes, str]:
+        """Get the raw Gradio response body and content type with connection handling"""
+        client = GradioClient.get_http_client()
+        try:
+            # Unreachable Gradio surfaces from the retry loop as a 503
+            return await GradioClient.fetch_data_with_retry(client, fn_index, data)
+            
+        except HTTPException:
+            raise
+        except asyncio.TimeoutError:
+            logger.error("Request to Gradio timed out")
+            raise HTTPException(status_code=504, detail="Request to Gradio timed out")
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
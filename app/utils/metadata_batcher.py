@@ -0,0 +1,89 @@
+"""
+Coalesces Google Drive metadata lookups that arrive close together into batch requests
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.utils.google_drive import GoogleDriveService
+
+logger = logging.getLogger(__name__)
+
+# Drive accepts up to 100 calls per batch request
+METADATA_BATCH_MAX_SIZE = 100
+METADATA_BATCH_MAX_WAIT = 0.05  # 50 ms
+
+class DriveMetadataBatcher:
+    """Buffers file IDs for one account and resolves each caller's lookup from a shared batch"""
+
+    def __init__(self, operation_type: str, max_batch_size: int = METADATA_BATCH_MAX_SIZE,
+                 max_wait: float = METADATA_BATCH_MAX_WAIT):
+        self.operation_type = operation_type
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The event loop only keeps weak references to tasks, so running batches are held here
+        self._tasks: Set[asyncio.Future] = set()
+
+    async def get_file_metadata(self, file_id: str) -> Dict[str, Any]:
+        """Queue a lookup and wait for the batch that carries it"""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((file_id, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand the pending lookups to a batch run"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Fetch the batch on the executor and route results back to the waiting callers"""
+        loop = asyncio.get_event_loop()
+        try:
+            results = await loop.run_in_executor(None, self._fetch, [file_id for file_id, _ in batch])
+        except Exception as e:
+            logger.error("Metadata batch for %s failed: %s", self.operation_type, e)
+            results = {file_id: e for file_id, _ in batch}
+
+        for file_id, future in batch:
+            if future.done():
+                continue
+            result = results.get(file_id)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            elif result is None:
+                future.set_exception(RuntimeError(f"No metadata returned for file ID {file_id}"))
+            else:
+                future.set_result(result)
+
+    def _fetch(self, file_ids: List[str]) -> Dict[str, Any]:
+        """Run the lookups with this thread's Drive client"""
+        drive_service = GoogleDriveService(operation_type=self.operation_type)
+        if len(set(file_ids)) == 1:
+            # A lone lookup keeps the single-request path and its retries
+            try:
+                return {file_ids[0]: drive_service.get_file_metadata(file_ids[0])}
+            except Exception as e:
+                return {file_ids[0]: e}
+        return drive_service.get_files_metadata(file_ids)
+
+# One batcher per account, created on first use
+_batchers: Dict[str, DriveMetadataBatcher] = {}
+
+def get_metadata_batcher(operation_type: str) -> DriveMetadataBatcher:
+    """Get the batcher for an account's operation type"""
+    batcher = _batchers.get(operation_type)
+    if batcher is None:
+        batcher = _batchers[operation_type] = DriveMetadataBatcher(operation_type)
+    return batcher
@@ -8,15 +8,15 @@ import time
 import logging
 import mimetypes
 import ssl
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
-from dotenv import load_dotenv
+from app.config import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
 logger = logging.getLogger(__name__)
 
@@ -28,13 +28,16 @@ class UploadTask:
     folder_id: str
     timestamp: float
     retry_count: int = 0
+    drive_file_id: Optional[str] = None
 
 class UploadQueueManager:
     """Manages a queue for uploading frames to Google Drive as they're created"""
     
-    def __init__(self, drive_service, folder_id: str, max_retries: int = None):
+    def __init__(self, drive_service, folder_id: str, max_retries: int = None,
+                 on_uploaded: Optional[Callable[[str, str], None]] = None):
         self.drive_service = drive_service
         self.folder_id = folder_id
+        self.on_uploaded = on_uploaded  # Called as on_uploaded(frame_name, drive_file_id) from the worker thread
         self.max_retries = max_retries if max_retries is not None else int(os.getenv("MAX_RETRIES", "3"))
         
         # Thread-safe queue for upload tasks
@@ -169,6 +172,11 @@ class UploadQueueManager:
                     if success:
                         with self.stats_lock:
                             self.stats['uploaded'] += 1
+                        if self.on_uploaded:
+                            try:
+                                self.on_uploaded(task.frame_name, task.drive_file_id)
+                            except Exception as e:
+                                logger.error(f"Error in upload callback for {task.frame_name}: {str(e)}")
                     else:
                         # Retry logic
                         task.retry_count += 1
@@ -232,6 +240,7 @@ class UploadQueueManager:
                 media_body=media,
                 fields='id'
             ).execute()
+            task.drive_file_id = file.get('id')
             
             logger.info(f"✅ Successfully uploaded {task.frame_name} to Google Drive")
             return True
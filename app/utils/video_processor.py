@@ -1,34 +1,55 @@
 import os
+import errno
 import subprocess
 import logging
 import shutil
 import time
 import re
 import threading
+from collections import deque
 from pathlib import Path
-from typing import Dict, Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
 from slugify import slugify
-import requests
 import mimetypes
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, BatchHttpRequest
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-import pickle
 import io
-import json
-from dotenv import load_dotenv
+import orjson
+from app.config import ensure_env
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.utils.upload_queue import UploadQueueManager
 from app.utils.frame_watcher import FrameWatcher
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Defaults read once at import
+SCENE_THRESHOLD = float(os.getenv("SCENE_THRESHOLD", "0.4"))
+GOOGLE_DRIVE_PARENT_FOLDER_ID = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "1ogD8Ca0a0kfV5tx_eMYtBS856ICn9qtp")
+
+# Matches the frame number, pts and pts_time fields of an FFmpeg showinfo line
+SHOWINFO_PATTERN = re.compile(r"n:\s*(\d+)\s.*pts:\s*(\d+)\s.*pts_time:\s*([\d.]+)\s")
+
+# FFmpeg output handed back to callers is capped to its tail; only showinfo lines are kept in full
+FFMPEG_OUTPUT_TAIL_CHARS = 1000
+FFMPEG_OUTPUT_TAIL_LINES = 50
+
+# FFmpeg writes streaming-extraction frames to stdout as back-to-back JPEGs (image2pipe);
+# each frame ends at the end-of-image marker that follows its scan data
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+JPEG_SOS = 0xDA
+FRAME_PIPE_READ_SIZE = 1 << 16
+
+# Matches extracted frame files (frame_000001.jpg, ...); compiled once for the directory scans
+is_frame_file = re.compile(r'frame_.*\.jpg').fullmatch
+
 class VideoProcessor:
     @staticmethod
     def create_safe_directory(base_path: str, filename: str, create_subfolder: bool = True) -> str:
@@ -69,10 +90,19 @@ class VideoProcessor:
             source_file = os.path.join(source_path, filename)
             dest_file = os.path.join(dest_dir, filename)
             
-            if not os.path.exists(source_file):
+            # Rename in place when source and destination share a filesystem; only
+            # fall back to shutil.move (copy + delete) across devices
+            try:
+                os.replace(source_file, dest_file)
+            except FileNotFoundError:
                 return False, f"Source file not found: {source_file}"
-            
-            shutil.move(source_file, dest_file)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Different devices: this is a full byte copy, so flag it for operators who
+                # can put the download and destination folders on the same volume
+                logger.warning(f"{source_path} and {dest_dir} are on different filesystems; copying {os.path.getsize(source_file)} bytes instead of renaming")
+                shutil.move(source_file, dest_file)
             logger.info(f"Moved file from {source_file} to {dest_file}")
             return True, dest_file
             
@@ -86,8 +116,7 @@ class VideoProcessor:
         Parse FFmpeg showinfo filter output to extract frame metadata
         """
         scene_data = []
-        # Regular expression to match showinfo output
-        pattern = r"n:\s*(\d+)\s.*pts:\s*(\d+)\s.*pts_time:\s*([\d.]+)\s.*"
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         # Get accurate FPS using FFprobe or MediaInfo
         fps = VideoProcessor._get_accurate_fps(video_path)
@@ -99,7 +128,7 @@ class VideoProcessor:
                 if 'FFmpeg: ' in line:
                     clean_line = line.split('FFmpeg: ', 1)[1]
                 
-                match = re.search(pattern, clean_line)
+                match = SHOWINFO_PATTERN.search(clean_line)
                 if match:
                     frame_num, pts, pts_time = match.groups()
                     frame_number = int(frame_num) + 1  # Add 1 to convert from 0-based to 1-based indexing
@@ -123,7 +152,8 @@ class VideoProcessor:
                     })
                     
                     # Debug logging for timestamp extraction
-                    logger.debug(f"Extracted timestamp for frame {frame_number}: {timestamp}s ({formatted_time})")
+                    if debug:
+                        logger.debug("Extracted timestamp for frame %d: %ss (%s)", frame_number, timestamp, formatted_time)
         
         return scene_data
 
@@ -153,8 +183,7 @@ class VideoProcessor:
             
             result = subprocess.run(ffprobe_cmd, capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
-                import json
-                data = json.loads(result.stdout)
+                data = orjson.loads(result.stdout)
                 
                 if 'streams' in data and len(data['streams']) > 0:
                     stream = data['streams'][0]
@@ -189,8 +218,7 @@ class VideoProcessor:
             
             result = subprocess.run(mediainfo_cmd, capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
-                import json
-                data = json.loads(result.stdout)
+                data = orjson.loads(result.stdout)
                 
                 if 'media' in data and 'track' in data['media']:
                     for track in data['media']['track']:
@@ -233,7 +261,7 @@ class VideoProcessor:
         try:
             # Use environment variable for scene threshold if not provided
             if scene_threshold is None:
-                scene_threshold = float(os.getenv("SCENE_THRESHOLD", "0.4"))
+                scene_threshold = SCENE_THRESHOLD
             
             start_time = time.time()
             logger.info(f"Starting frame extraction for video: {video_path}")
@@ -298,7 +326,7 @@ class VideoProcessor:
                 logger.error(f"FFmpeg error (return code {process.returncode}): {process.stderr[:500]}")
                 return False, {
                     "error": "FFmpeg processing failed",
-                    "details": process.stderr
+                    "details": process.stderr[-FFMPEG_OUTPUT_TAIL_CHARS:]
                 }
             
             # Parse metadata from FFmpeg output
@@ -307,21 +335,29 @@ class VideoProcessor:
             logger.info(f"Parsed {len(scene_metadata)} scene changes")
             
             # Count extracted frames
-            frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
+            frames = [f for f in os.listdir(output_dir) if is_frame_file(f)]
             processing_time = time.time() - start_time
             
             logger.info(f"Extracted {len(frames)} frames in {processing_time:.2f} seconds")
             
+            # video_info is optional metadata, so unparseable ffprobe output must not fail the extraction
+            video_info = None
+            if probe_result.stdout:
+                try:
+                    video_info = orjson.loads(probe_result.stdout)
+                except orjson.JSONDecodeError as e:
+                    logger.warning(f"Could not parse ffprobe output, omitting video_info: {str(e)}")
+            
             result = {
                 "frames_extracted": len(frames),
                 "output_directory": output_dir,
                 "processing_time": round(processing_time, 2),
                 "scene_metadata": scene_metadata,
                 "ffmpeg_output": {
-                    "stdout": process.stdout,
-                    "stderr": process.stderr
+                    "stdout": process.stdout[-FFMPEG_OUTPUT_TAIL_CHARS:],
+                    "stderr": process.stderr[-FFMPEG_OUTPUT_TAIL_CHARS:]
                 },
-                "video_info": probe_result.stdout
+                "video_info": video_info
             }
             
             logger.info(f"Frame extraction complete: {len(frames)} frames extracted")
@@ -331,20 +367,6 @@ class VideoProcessor:
             logger.exception(f"Error in frame extraction: {str(e)}")
             return False, {"error": str(e)}
 
-    @staticmethod
-    def send_callback(callback_url: str, data: Dict) -> bool:
-        """
-        Send results to callback URL if provided
-        """
-        try:
-            response = requests.post(callback_url, json=data)
-            response.raise_for_status()
-            logger.info(f"Callback sent successfully to {callback_url}")
-            return True
-        except Exception as e:
-            logger.error(f"Error sending callback: {str(e)}")
-            return False
-
     @staticmethod
     def upload_frames_to_drive(output_dir: str, original_filename: str, token_path: str = None) -> Tuple[bool, Dict]:
         """
@@ -369,11 +391,11 @@ class VideoProcessor:
             logger.info(f"Target folder name: {safe_foldername}")
             
             # Target parent folder ID for "ScreenRecorded Frames"
-            parent_folder_id = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "1ogD8Ca0a0kfV5tx_eMYtBS856ICn9qtp")
+            parent_folder_id = GOOGLE_DRIVE_PARENT_FOLDER_ID
             logger.info(f"Parent folder ID: {parent_folder_id}")
             
             # Get frames to upload
-            frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
+            frames = [f for f in os.listdir(output_dir) if is_frame_file(f)]
             logger.info(f"Found {len(frames)} frames to upload")
             
             if not frames:
@@ -415,7 +437,7 @@ class VideoProcessor:
             }
             
             logger.info(f"Creating folder in Google Drive: {safe_foldername}")
-            logger.info(f"Folder metadata: {json.dumps(folder_metadata)}")
+            logger.debug("Folder metadata: %s", folder_metadata)
             folder = drive_service.files().create(
                 body=folder_metadata,
                 fields='id'
@@ -587,11 +609,11 @@ class VideoProcessor:
             logger.info(f"Target folder name: {safe_foldername}")
             
             # Target parent folder ID for "ScreenRecorded Frames"
-            parent_folder_id = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "1ogD8Ca0a0kfV5tx_eMYtBS856ICn9qtp")
+            parent_folder_id = GOOGLE_DRIVE_PARENT_FOLDER_ID
             logger.info(f"Parent folder ID: {parent_folder_id}")
             
             # Get frames to upload
-            frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
+            frames = [f for f in os.listdir(output_dir) if is_frame_file(f)]
             logger.info(f"Found {len(frames)} frames to upload")
             
             if not frames:
@@ -829,11 +851,11 @@ class VideoProcessor:
             logger.info(f"Target folder name: {safe_foldername}")
             
             # Target parent folder ID for "ScreenRecorded Frames"
-            parent_folder_id = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "1ogD8Ca0a0kfV5tx_eMYtBS856ICn9qtp")
+            parent_folder_id = GOOGLE_DRIVE_PARENT_FOLDER_ID
             logger.info(f"Parent folder ID: {parent_folder_id}")
             
             # Get frames to upload
-            frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
+            frames = [f for f in os.listdir(output_dir) if is_frame_file(f)]
             logger.info(f"Found {len(frames)} frames to upload")
             
             if not frames:
@@ -1061,7 +1083,7 @@ class VideoProcessor:
             logger.info(f"Target folder name: {safe_foldername}")
             
             # Target parent folder ID for "ScreenRecorded Frames"
-            parent_folder_id = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "1ogD8Ca0a0kfV5tx_eMYtBS856ICn9qtp")
+            parent_folder_id = GOOGLE_DRIVE_PARENT_FOLDER_ID
             logger.info(f"Parent folder ID: {parent_folder_id}")
             
             # Use the GoogleDriveService class for authentication
@@ -1120,7 +1142,7 @@ class VideoProcessor:
             logger.info(f"Monitoring directory for new frames: {output_dir}")
             
             # Check for existing frames and add them to queue
-            existing_frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
+            existing_frames = [f for f in os.listdir(output_dir) if is_frame_file(f)]
             if existing_frames:
                 logger.info(f"Found {len(existing_frames)} existing frames, adding to queue")
                 for frame in existing_frames:
@@ -1217,7 +1239,79 @@ class VideoProcessor:
             }
     
     @staticmethod
-    def extract_frames_with_streaming_upload(video_path: str, output_dir: str, scene_threshold: float = None, original_filename: str = None, resume_from_seconds: float = None) -> Tuple[bool, Dict]:
+    def jpeg_scan_offset(buffer: bytearray) -> Optional[int]:
+        """
+        Walk the header segments of the JPEG at the start of buffer
+        
+        Header segments (tables, comments, EXIF thumbnails) are skipped by their length, so
+        FF D9 bytes inside them are never mistaken for the end of the image.
+        
+        Returns:
+            Offset where the first scan's entropy-coded data starts, or None if the
+            headers are not all in the buffer yet
+        """
+        if len(buffer) < 2:
+            return None
+        if buffer[:2] != JPEG_SOI:
+            raise ValueError("FFmpeg frame stream does not start with a JPEG start-of-image marker")
+        pos = 2
+        while len(buffer) >= pos + 4:
+            if buffer[pos] != 0xFF:
+                raise ValueError(f"Expected a JPEG marker at byte {pos} of the frame")
+            marker = buffer[pos + 1]
+            if marker == 0xFF:  # Fill byte before a marker
+                pos += 1
+                continue
+            pos += 2 + ((buffer[pos + 2] << 8) | buffer[pos + 3])
+            if marker == JPEG_SOS:
+                return pos
+        return None
+
+    @staticmethod
+    def iter_jpeg_frames(stream, read_size: int = FRAME_PIPE_READ_SIZE):
+        """
+        Split a concatenated JPEG byte stream (FFmpeg image2pipe output) into frames
+        
+        The end marker is only searched for in the scan data. There the encoder stuffs a
+        00 after every FF data byte, so FF D9 can only be the real end of image. FFmpeg's
+        mjpeg encoder writes one baseline scan per frame, which is all this handles.
+        
+        Args:
+            stream: Binary stream with read1(), e.g. a subprocess stdout pipe
+            read_size: Maximum bytes to take from the pipe per read
+            
+        Yields:
+            Bytes of one complete JPEG per frame
+        """
+        buffer = bytearray()
+        scan_start = None  # Where the current frame's scan data starts, once its headers are in
+        search_from = 0
+        while True:
+            chunk = stream.read1(read_size)
+            if not chunk:
+                break
+            buffer += chunk
+            while True:
+                if scan_start is None:
+                    scan_start = VideoProcessor.jpeg_scan_offset(buffer)
+                    if scan_start is None:
+                        break
+                    search_from = scan_start
+                end = buffer.find(JPEG_EOI, search_from)
+                if end == -1:
+                    # Keep the last byte in the search window in case the marker was split
+                    search_from = max(scan_start, len(buffer) - 1)
+                    break
+                end += len(JPEG_EOI)
+                yield bytes(buffer[:end])
+                del buffer[:end]
+                scan_start = None
+        if buffer:
+            logger.warning(f"Discarding {len(buffer)} trailing bytes without a JPEG end marker")
+
+    @staticmethod
+    def extract_frames_with_streaming_upload(video_path: str, output_dir: str, scene_threshold: float = None, original_filename: str = None, resume_from_seconds: float = None,
+                                             on_frame_uploaded: Optional[Callable[[str, str], None]] = None) -> Tuple[bool, Dict]:
         """
         Extract frames from video and upload them to Google Drive as they're created
         
@@ -1226,6 +1320,7 @@ class VideoProcessor:
             output_dir: Directory to save extracted frames
             scene_threshold: Scene detection threshold (0.0 to 1.0)
             original_filename: Original filename for folder naming
+            on_frame_uploaded: Optional hook called with (frame_name, drive_file_id) after each upload
             
         Returns:
             Tuple of (success, result_dict)
@@ -1233,7 +1328,7 @@ class VideoProcessor:
         try:
             # Use environment variable for scene threshold if not provided
             if scene_threshold is None:
-                scene_threshold = float(os.getenv("SCENE_THRESHOLD", "0.4"))
+                scene_threshold = SCENE_THRESHOLD
             
             start_time = time.time()
             logger.info(f"Starting streaming frame extraction and upload")
@@ -1245,7 +1340,7 @@ class VideoProcessor:
             os.makedirs(output_dir, exist_ok=True)
             
             # Clear any existing frames
-            existing_frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
+            existing_frames = [f for f in os.listdir(output_dir) if is_frame_file(f)]
             for frame in existing_frames:
                 os.remove(os.path.join(output_dir, frame))
                 logger.info(f"Removed existing frame: {frame}")
@@ -1262,7 +1357,7 @@ class VideoProcessor:
             
             # Create folder in Google Drive
             safe_foldername = slugify(Path(original_filename or "extracted_frames").stem, separator="_")
-            parent_folder_id = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "1ogD8Ca0a0kfV5tx_eMYtBS856ICn9qtp")
+            parent_folder_id = GOOGLE_DRIVE_PARENT_FOLDER_ID
             
             # Check if folder already exists
             logger.info(f"Checking if Google Drive folder already exists: {safe_foldername}")
@@ -1289,19 +1384,12 @@ class VideoProcessor:
                 logger.info(f"New Google Drive folder URL: https://drive.google.com/drive/folders/{folder_id}")
             
             # Set up upload queue
-            upload_queue = UploadQueueManager(drive_service, folder_id)
+            upload_queue = UploadQueueManager(drive_service, folder_id, on_uploaded=on_frame_uploaded)
             upload_queue.start()
             
-            # Set up frame watcher
-            def on_new_frame(frame_path: str, frame_name: str):
-                logger.info(f"New frame detected: {frame_name}, adding to upload queue")
-                upload_queue.add_frame(frame_path, frame_name)
-            
-            frame_watcher = FrameWatcher(output_dir, on_new_frame, poll_interval=0.2)
-            frame_watcher.start()
-            
-            # Start FFmpeg process (non-blocking) with optimized settings
-            output_pattern = os.path.join(output_dir, "frame_%06d.jpg")
+            # Start FFmpeg process (non-blocking) with optimized settings. Frames come back
+            # over stdout, so each one is queued as soon as FFmpeg finishes encoding it
+            # instead of being found later by polling the directory.
             
             # Auto-detect optimal thread count (or use all available cores)
             import multiprocessing
@@ -1323,29 +1411,62 @@ class VideoProcessor:
                 "-vsync", "0",
                 "-q:v", "3",  # Better quality/speed balance for JPEG
                 "-preset", "ultrafast",  # Fastest encoding preset
-                output_pattern
+                "-f", "image2pipe",
+                "-c:v", "mjpeg",
+                "pipe:1"
             ])
             
             logger.info(f"Starting FFmpeg process: {' '.join(cmd)}")
             ffmpeg_process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1  # Line buffered
+                stderr=subprocess.PIPE
             )
             
-            # Create thread to consume stderr to prevent buffer blocking and collect output
-            ffmpeg_stderr_lines = []
+            # Write each piped frame under the usual frame_%06d.jpg name (the local frames are
+            # still part of the result) and queue it for upload straight away. The reader records
+            # each frame as it writes it, so the caller needs no directory scan afterwards.
+            frames_written = 0
+            frames_info = []
+            frame_reader_error = None
+            
+            def consume_ffmpeg_frames():
+                """Consume FFmpeg's stdout, saving each frame and queueing its upload"""
+                nonlocal frames_written, last_ffmpeg_activity, frame_reader_error
+                try:
+                    for frame_bytes in VideoProcessor.iter_jpeg_frames(ffmpeg_process.stdout):
+                        frame_name = f"frame_{frames_written + 1:06d}.jpg"
+                        frame_path = os.path.join(output_dir, frame_name)
+                        with open(frame_path, 'wb') as f:
+                            f.write(frame_bytes)
+                        frames_info.append({"filename": frame_name, "path": frame_path, "size_bytes": len(frame_bytes)})
+                        frames_written += 1
+                        last_ffmpeg_activity = time.time()
+                        upload_queue.add_frame(frame_path, frame_name)
+                except Exception as e:
+                    logger.error(f"Error reading FFmpeg frames: {e}")
+                    frame_reader_error = e
+            
+            frame_thread = threading.Thread(target=consume_ffmpeg_frames, daemon=True)
+            frame_thread.start()
+            
+            # Create thread to consume stderr to prevent buffer blocking. Showinfo lines are
+            # kept for metadata parsing; everything else only as a bounded tail.
+            showinfo_lines = []
+            ffmpeg_stderr_tail = deque(maxlen=FFMPEG_OUTPUT_TAIL_LINES)
             
             def consume_ffmpeg_output():
                 """Consume FFmpeg output to prevent buffer blocking and collect for metadata parsing"""
                 nonlocal last_ffmpeg_activity
                 try:
-                    for line in ffmpeg_process.stderr:
-                        if line.strip():
-                            logger.debug(f"FFmpeg: {line.strip()}")
-                            ffmpeg_stderr_lines.append(line.strip())
+                    for line in io.TextIOWrapper(ffmpeg_process.stderr, encoding='utf-8', errors='replace'):
+                        line = line.strip()
+                        if line:
+                            logger.debug(f"FFmpeg: {line}")
+                            if 'Parsed_showinfo' in line:
+                                showinfo_lines.append(line)
+                            else:
+                                ffmpeg_stderr_tail.append(line)
                             # Update activity timestamp whenever FFmpeg produces output
                             last_ffmpeg_activity = time.time()
                 except Exception as e:
@@ -1355,7 +1476,6 @@ class VideoProcessor:
             output_thread.start()
             
             # Monitor FFmpeg process while frames are being extracted and uploaded
-            ffmpeg_output = []
             frames_processed = 0
             
             # Add stall detection variables
@@ -1371,10 +1491,9 @@ class VideoProcessor:
                         break
                     
                     # Check for new frames periodically
-                    current_frames = [f for f in os.listdir(output_dir) if f.startswith("frame_") and f.endswith(".jpg")]
-                    if len(current_frames) > frames_processed:
+                    if frames_written > frames_processed:
                         last_frame_time = time.time()
-                        frames_processed = len(current_frames)
+                        frames_processed = frames_written
                         queue_stats = upload_queue.get_statistics()
                         logger.info(f"Progress: {frames_processed} frames extracted, "
                                   f"{queue_stats['uploaded']} uploaded, "
@@ -1403,26 +1522,31 @@ class VideoProcessor:
                     time.sleep(2)
                     if ffmpeg_process.poll() is None:
                         ffmpeg_process.kill()
-                    frame_watcher.stop()
                     upload_queue.stop()
                     return False, {"error": "Process interrupted by user"}
             
-            # Wait for FFmpeg to complete
-            stdout, stderr = ffmpeg_process.communicate()
-            ffmpeg_output.append(stderr)
+            # Wait for FFmpeg to complete; the reader threads own its pipes
+            ffmpeg_process.wait()
             
-            # Wait for output thread to finish collecting all stderr
+            # Wait for the reader threads to drain the last frames and stderr. FFmpeg has exited,
+            # so its stdout is at EOF and the frame reader finishes once the last frame is written.
+            frame_thread.join()
             if output_thread.is_alive():
                 output_thread.join(timeout=5)
             
-            # Combine all collected stderr for metadata parsing
-            combined_stderr = '\n'.join(ffmpeg_stderr_lines)
+            # Showinfo lines feed the metadata parser; the tail goes back to the caller
+            showinfo_output = '\n'.join(showinfo_lines)
+            stderr_tail = '\n'.join(ffmpeg_stderr_tail)[-FFMPEG_OUTPUT_TAIL_CHARS:]
             
             if ffmpeg_process.returncode != 0:
-                logger.error(f"FFmpeg failed: {stderr[:500]}")
-                frame_watcher.stop()
+                logger.error(f"FFmpeg failed: {stderr_tail[-500:]}")
+                upload_queue.stop()
+                return False, {"error": "FFmpeg processing failed", "details": stderr_tail}
+            
+            if frame_reader_error is not None:
+                # The frame list would be silently truncated, so fail instead of returning it
                 upload_queue.stop()
-                return False, {"error": "FFmpeg processing failed", "details": stderr}
+                return False, {"error": "Failed to read extracted frames", "details": str(frame_reader_error)}
             
             logger.info("FFmpeg processing completed, waiting for all uploads to finish")
             
@@ -1432,8 +1556,7 @@ class VideoProcessor:
             # Wait for all uploads to complete
             success = upload_queue.wait_for_completion(timeout=1800)
             
-            # Stop watchers
-            frame_watcher.stop()
+            # Stop the upload worker
             upload_queue.stop()
             
             # Get final statistics
@@ -1441,7 +1564,7 @@ class VideoProcessor:
             total_time = time.time() - start_time
             
             # Parse metadata from FFmpeg output
-            scene_metadata = VideoProcessor.parse_ffmpeg_metadata(combined_stderr, video_path)
+            scene_metadata = VideoProcessor.parse_ffmpeg_metadata(showinfo_output, video_path)
             logger.info(f"Extracted {len(scene_metadata)} frame timestamps from FFmpeg metadata")
             
             # Create result
@@ -1461,10 +1584,11 @@ class VideoProcessor:
                 "scene_metadata": scene_metadata,
                 "ffmpeg_output": {
                     "stdout": "",  # Not captured in streaming mode
-                    "stderr": combined_stderr
+                    "stderr": stderr_tail
                 },
-                "video_info": "{}",  # Will be filled by caller if needed
-                "queue_stats": stats
+                "video_info": {},  # Not probed in streaming mode
+                "queue_stats": stats,
+                "frames_info": frames_info
             }
             
             logger.info(f"===== STREAMING UPLOAD COMPLETE =====")
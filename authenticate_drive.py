@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 """
 Helper script to authenticate with Google Drive and generate the token file.
-Run this script once to authenticate and create a token.pickle file.
+Run this script once to authenticate and create the token file (stored as JSON).
 """
 
 import os
-import pickle
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from app.utils.google_drive import load_token, save_token
 
 def authenticate_drive():
     """
@@ -27,12 +27,11 @@ def authenticate_drive():
     creds = None
     # Check if we have a token file
     if os.path.exists(token_path):
-        with open(token_path, 'rb') as token:
-            try:
-                creds = pickle.load(token)
-                print("Found existing token file")
-            except Exception as e:
-                print(f"Error loading token file: {str(e)}")
+        try:
+            creds = load_token(token_path)
+            print("Found existing token file")
+        except Exception as e:
+            print(f"Error loading token file: {str(e)}")
     
     # If there are no valid credentials, run the flow
     if not creds or not creds.valid:
@@ -50,9 +49,8 @@ def authenticate_drive():
             print("Successfully authenticated with Google Drive")
         
         # Save the credentials for the next run
-        with open(token_path, 'wb') as token:
-            pickle.dump(creds, token)
-            print(f"Saved OAuth token to {token_path}")
+        save_token(creds, token_path)
+        print(f"Saved OAuth token to {token_path}")
     
     # Test the credentials by listing files
     try:
@@ -5,6 +5,9 @@ import time
 import argparse
 import os
 
+# One session for all demo calls so they share a keep-alive connection to the API
+session = requests.Session()
+
 def demo_video_processing(video_id, api_url="http://localhost:8000"):
     """Demo the video processing functionality with Google Drive"""
     endpoint = f"{api_url}/api/v1/process-drive-video"
@@ -21,7 +24,7 @@ def demo_video_processing(video_id, api_url="http://localhost:8000"):
     }
     
     print(f"Sending request to process video {video_id} from Google Drive...")
-    response = requests.post(endpoint, json=payload, headers=headers)
+    response = session.post(endpoint, json=payload, headers=headers)
     
     if response.status_code == 200:
         result = response.json()
@@ -37,7 +40,7 @@ def demo_gradio_integration(api_url="http://localhost:8000"):
     health_endpoint = f"{api_url}/api/v1/gradio/health"
     
     print("Checking Gradio server health...")
-    response = requests.get(health_endpoint)
+    response = session.get(health_endpoint)
     
     if response.status_code == 200:
         health_result = response.json()
@@ -54,7 +57,7 @@ def demo_gradio_integration(api_url="http://localhost:8000"):
     data_endpoint = f"{api_url}/api/v1/gradio/gradio-data"
     
     print("Getting data from Gradio...")
-    response = requests.get(data_endpoint)
+    response = session.get(data_endpoint)
     
     if response.status_code == 200:
         data_result = response.json()
@@ -79,7 +82,7 @@ def main():
     
     # Check API health first
     try:
-        health_response = requests.get(f"{args.api_url}/api/v1/health")
+        health_response = session.get(f"{args.api_url}/api/v1/health")
         if health_response.status_code != 200:
             print(f"API server is not healthy: {health_response.status_code} - {health_response.text}")
             return
@@ -152,7 +152,7 @@ trap cleanup SIGINT SIGTERM
 # Start uvicorn with debug log level
 # Important: Don't redirect output for live logging
 echo -e "${GREEN}Press Ctrl+C to gracefully shutdown the server${NC}"
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload --log-level debug &
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --reload --log-level debug &
 
 # Wait for the background process
 UVICORN_PID=$!
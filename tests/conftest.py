@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add the project root to the Python path so the app package can be imported
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
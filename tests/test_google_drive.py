@@ -0,0 +1,177 @@
+"""
+Unit tests for OAuth token storage and ranged media downloads
+"""
+import errno
+import io
+import json
+import os
+import pickle
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from app.utils import google_drive
+from app.utils.google_drive import GoogleDriveService, load_token, save_token
+
+
+def make_credentials() -> Credentials:
+    return Credentials(
+        token="access-token",
+        refresh_token="refresh-token",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="client-id",
+        client_secret="client-secret",
+        scopes=["https://www.googleapis.com/auth/drive"],
+    )
+
+
+def test_load_token_migrates_pickled_token_to_json(tmp_path):
+    token_path = tmp_path / "token.pickle"
+    token_path.write_bytes(pickle.dumps(make_credentials()))
+
+    creds = load_token(str(token_path))
+    assert creds.token == "access-token"
+    assert creds.refresh_token == "refresh-token"
+
+    # The file now holds authorized-user JSON, which loads without pickle
+    data = json.loads(token_path.read_text())
+    assert data["refresh_token"] == "refresh-token"
+    assert data["client_id"] == "client-id"
+    reloaded = load_token(str(token_path))
+    assert reloaded.token == "access-token"
+    assert reloaded.refresh_token == "refresh-token"
+
+
+def test_save_and_load_json_token(tmp_path):
+    token_path = tmp_path / "token.json"
+    save_token(make_credentials(), str(token_path))
+    creds = load_token(str(token_path))
+    assert creds.client_secret == "client-secret"
+    assert creds.scopes == ["https://www.googleapis.com/auth/drive"]
+
+
+class FakeRaw:
+    def __init__(self, data: bytes):
+        self.stream = io.BytesIO(data)
+
+    def readinto(self, buffer) -> int:
+        return self.stream.readinto(buffer)
+
+
+class FakeResponse:
+    def __init__(self, data: bytes, status_code: int):
+        self.raw = FakeRaw(data)
+        self.status_code = status_code
+        self.headers = {"Content-Length": str(len(data))}
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Stand-in for AuthorizedSession serving byte ranges of one file"""
+
+    content = b""
+    honour_range = True
+    short_by = 0
+    requests = []
+
+    def __init__(self, creds):
+        self.creds = creds
+
+    def get(self, url, headers=None, stream=False):
+        headers = headers or {}
+        self.requests.append((url, headers))
+        if "Range" not in headers or not self.honour_range:
+            return FakeResponse(self.content, 200)
+        start, end = (int(n) for n in headers["Range"][len("bytes="):].split("-"))
+        return FakeResponse(self.content[start:end + 1 - self.short_by], 206)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    FakeSession.content = bytes(range(256)) * 4
+    FakeSession.honour_range = True
+    FakeSession.short_by = 0
+    FakeSession.requests = []
+    monkeypatch.setattr(google_drive, "AuthorizedSession", FakeSession)
+    monkeypatch.setattr(google_drive, "DOWNLOAD_RANGE_MIN_SIZE", 100)
+    monkeypatch.setattr(google_drive, "DOWNLOAD_BUFFER_SIZE", 7)
+    monkeypatch.setattr(google_drive, "GDRIVE_DOWNLOAD_PARALLELISM", 4)
+    service = GoogleDriveService.__new__(GoogleDriveService)
+    service.creds = make_credentials()
+    return service
+
+
+def test_download_ranges_reassembles_file(tmp_path, drive):
+    destination = tmp_path / "video.mp4"
+    drive._download_ranges("file-id", str(destination), len(FakeSession.content))
+    assert destination.read_bytes() == FakeSession.content
+    ranges = sorted(headers["Range"] for _, headers in FakeSession.requests)
+    assert ranges == ["bytes=0-255", "bytes=256-511", "bytes=512-767", "bytes=768-1023"]
+    assert all(headers["Accept-Encoding"] == "identity" for _, headers in FakeSession.requests)
+
+
+def test_download_ranges_respects_min_part_size(monkeypatch, tmp_path, drive):
+    monkeypatch.setattr(google_drive, "DOWNLOAD_RANGE_MIN_SIZE", 400)
+    destination = tmp_path / "video.mp4"
+    drive._download_ranges("file-id", str(destination), len(FakeSession.content))
+    assert destination.read_bytes() == FakeSession.content
+    assert len(FakeSession.requests) == 3
+
+
+def test_download_ranges_rejects_full_response(tmp_path, drive):
+    FakeSession.honour_range = False
+    with pytest.raises(RuntimeError, match="returned status 200"):
+        drive._download_ranges("file-id", str(tmp_path / "video.mp4"), len(FakeSession.content))
+
+
+def test_download_ranges_detects_short_range(tmp_path, drive):
+    FakeSession.short_by = 1
+    with pytest.raises(IOError, match="ended early"):
+        drive._download_ranges("file-id", str(tmp_path / "video.mp4"), len(FakeSession.content))
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fallocate"), reason="posix_fallocate not available")
+def test_preallocate_reserves_file_size(tmp_path):
+    with open(tmp_path / "video.mp4", "wb") as f:
+        google_drive.preallocate(f.fileno(), 4096)
+        assert os.fstat(f.fileno()).st_size == 4096
+
+
+def test_preallocate_ignores_unsupported_filesystems(monkeypatch, tmp_path):
+    def unsupported(fd, offset, length):
+        raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+    monkeypatch.setattr(google_drive.os, "posix_fallocate", unsupported, raising=False)
+    with open(tmp_path / "video.mp4", "wb") as f:
+        google_drive.preallocate(f.fileno(), 4096)
+
+
+def test_stream_media_sizes_file_from_content_length(tmp_path, drive):
+    destination = tmp_path / "video.mp4"
+    expected = drive._stream_media_to_file("file-id", str(destination))
+    assert expected == len(FakeSession.content)
+    assert destination.read_bytes() == FakeSession.content
+    [(_, headers)] = FakeSession.requests
+    assert headers["Accept-Encoding"] == "identity"
+
+
+def test_stream_media_trims_reservation_on_short_body(tmp_path, drive):
+    destination = tmp_path / "video.mp4"
+    expected = drive._stream_media_to_file("file-id", str(destination), len(FakeSession.content) + 500)
+    # The size check after the download still sees the shortfall
+    assert expected == len(FakeSession.content) + 500
+    assert destination.read_bytes() == FakeSession.content
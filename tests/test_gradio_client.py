@@ -0,0 +1,58 @@
+"""
+Unit tests for the Gradio retry delay helpers
+"""
+import random
+from collections import Counter
+
+from app.utils import gradio_client
+from app.utils.gradio_client import initial_retry_delay, next_retry_delay, record_retry_outcome
+
+
+def test_next_retry_delay_stays_within_bounds():
+    random.seed(0)
+    base = delay = gradio_client.RETRY_BASE_DELAY
+    for _ in range(200):
+        delay = next_retry_delay(base, delay)
+        assert base <= delay <= gradio_client.RETRY_MAX_DELAY
+
+
+def test_next_retry_delay_is_capped(monkeypatch):
+    # Always draw the top of the range so the delay grows as fast as it can
+    monkeypatch.setattr(gradio_client.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(gradio_client, "RETRY_MAX_DELAY", 10.0)
+    base = delay = 0.5
+    delays = []
+    for _ in range(5):
+        delay = next_retry_delay(base, delay)
+        delays.append(delay)
+    assert delays[:2] == [1.5, 4.5]
+    assert delays[2:] == [10.0, 10.0, 10.0]
+
+
+def test_initial_retry_delay_without_history_is_base():
+    assert initial_retry_delay(Counter()) == gradio_client.RETRY_BASE_DELAY
+
+
+def test_initial_retry_delay_scales_with_failure_rate(monkeypatch):
+    monkeypatch.setattr(gradio_client, "RETRY_BASE_DELAY", 0.5)
+    monkeypatch.setattr(gradio_client, "RETRY_MAX_DELAY", 10.0)
+    assert initial_retry_delay(Counter(success=10)) == 0.5
+    assert initial_retry_delay(Counter(success=5, failure=5)) == 1.5
+    assert initial_retry_delay(Counter(failure=10)) == 2.5
+
+
+def test_initial_retry_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(gradio_client, "RETRY_BASE_DELAY", 4.0)
+    monkeypatch.setattr(gradio_client, "RETRY_MAX_DELAY", 10.0)
+    assert initial_retry_delay(Counter(failure=3)) == 10.0
+
+
+def test_record_retry_outcome_halves_counts_past_window(monkeypatch):
+    monkeypatch.setattr(gradio_client, "RETRY_STATS_WINDOW", 10)
+    stats = Counter()
+    for _ in range(10):
+        record_retry_outcome(stats, "failure")
+    assert stats["failure"] == 10
+    record_retry_outcome(stats, "success")
+    assert stats["failure"] == 5
+    assert stats["success"] == 0
@@ -0,0 +1,89 @@
+"""
+Unit tests for the Drive metadata batcher
+"""
+import asyncio
+
+import pytest
+
+from app.utils import metadata_batcher
+from app.utils.metadata_batcher import DriveMetadataBatcher
+
+
+class FakeDriveService:
+    """Stand-in for GoogleDriveService that records lookups and fails on request"""
+
+    calls = []
+    missing = set()
+    broken = False
+
+    def __init__(self, operation_type=None):
+        self.operation_type = operation_type
+
+    def get_file_metadata(self, file_id):
+        self.calls.append([file_id])
+        if file_id in self.missing:
+            raise LookupError(f"File not found: {file_id}")
+        return {"id": file_id, "name": f"{file_id}.mp4"}
+
+    def get_files_metadata(self, file_ids):
+        self.calls.append(list(file_ids))
+        if self.broken:
+            raise ConnectionError("batch request failed")
+        return {
+            file_id: LookupError(f"File not found: {file_id}") if file_id in self.missing
+            else {"id": file_id, "name": f"{file_id}.mp4"}
+            for file_id in file_ids
+        }
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    FakeDriveService.calls = []
+    FakeDriveService.missing = set()
+    FakeDriveService.broken = False
+    monkeypatch.setattr(metadata_batcher, "GoogleDriveService", FakeDriveService)
+    return FakeDriveService
+
+
+def lookup(file_ids, **kwargs):
+    """Look up the IDs concurrently through one batcher, returning results or exceptions"""
+    async def run():
+        batcher = DriveMetadataBatcher("download_primary", **kwargs)
+        results = await asyncio.gather(
+            *(batcher.get_file_metadata(file_id) for file_id in file_ids), return_exceptions=True
+        )
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+        return results
+    return asyncio.run(run())
+
+
+def test_concurrent_lookups_share_one_batch(drive):
+    results = lookup(["a", "b", "c"])
+    assert drive.calls == [["a", "b", "c"]]
+    assert [r["id"] for r in results] == ["a", "b", "c"]
+
+
+def test_lone_lookup_uses_single_request(drive):
+    [result] = lookup(["a"])
+    assert result == {"id": "a", "name": "a.mp4"}
+    assert drive.calls == [["a"]]
+
+
+def test_full_batch_flushes_without_waiting(drive):
+    results = lookup(["a", "b", "c"], max_batch_size=2, max_wait=0.01)
+    assert drive.calls == [["a", "b"], ["c"]]
+    assert [r["id"] for r in results] == ["a", "b", "c"]
+
+
+def test_missing_file_fails_only_its_own_caller(drive):
+    drive.missing = {"b"}
+    a, b, c = lookup(["a", "b", "c"])
+    assert isinstance(b, LookupError)
+    assert (a["id"], c["id"]) == ("a", "c")
+
+
+def test_failed_batch_fails_every_caller(drive):
+    drive.broken = True
+    results = lookup(["a", "b"])
+    assert all(isinstance(r, ConnectionError) for r in results)
@@ -0,0 +1,53 @@
+"""
+Unit tests for splitting FFmpeg's image2pipe output into JPEG frames
+"""
+import io
+
+import pytest
+
+from app.utils.video_processor import VideoProcessor
+
+
+def segment(marker: int, payload: bytes) -> bytes:
+    return bytes([0xFF, marker]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def jpeg(scan: bytes, *headers: bytes) -> bytes:
+    start_of_scan = segment(0xDA, b"\x01\x01\x00\x00\x3f\x00")
+    return b"\xff\xd8" + b"".join(headers) + start_of_scan + scan + b"\xff\xd9"
+
+
+def stream_of(data: bytes) -> io.BufferedReader:
+    return io.BufferedReader(io.BytesIO(data))
+
+
+FRAMES = [
+    jpeg(b"scan\xff\x00data", segment(0xE0, b"JFIF\x00")),
+    # End-of-image bytes inside header segments must not end the frame
+    jpeg(b"second", segment(0xFE, b"Lavc \xff\xd9 comment"), segment(0xDB, b"\x00" + b"\xff\xd9" * 32)),
+    # Restart markers and stuffed FF bytes inside the scan data
+    jpeg(b"a\xff\xd0b\xff\x00c"),
+    # Fill bytes before a marker
+    b"\xff\xd8\xff" + jpeg(b"fill")[2:],
+]
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 5, 1 << 16])
+def test_iter_jpeg_frames_splits_frames(read_size):
+    # Small reads split frames, segment headers and the end marker itself across reads
+    frames = list(VideoProcessor.iter_jpeg_frames(stream_of(b"".join(FRAMES)), read_size))
+    assert frames == FRAMES
+
+
+def test_iter_jpeg_frames_discards_trailing_partial_frame():
+    data = FRAMES[0] + FRAMES[1][:-1]
+    assert list(VideoProcessor.iter_jpeg_frames(stream_of(data), 4)) == [FRAMES[0]]
+
+
+def test_iter_jpeg_frames_empty_stream():
+    assert list(VideoProcessor.iter_jpeg_frames(stream_of(b""))) == []
+
+
+def test_iter_jpeg_frames_rejects_non_jpeg_stream():
+    with pytest.raises(ValueError):
+        list(VideoProcessor.iter_jpeg_frames(stream_of(b"not a jpeg stream")))
@@ -0,0 +1,347 @@
+"""
+Unit tests for the webhook helpers in the video router
+"""
+import asyncio
+import json
+from collections import OrderedDict
+
+import pytest
+
+from app.routers import video
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(video.time, "monotonic", fake)
+    return fake
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        self.text = ""
+
+
+class FakeCallbackClient:
+    """Stand-in for the shared callback client that replays scripted outcomes"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    async def post(self, url, content=None, headers=None):
+        self.requests.append((url, content, dict(headers or {})))
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+@pytest.fixture
+def callbacks(monkeypatch):
+    client = FakeCallbackClient()
+    monkeypatch.setattr(video, "get_callback_client", lambda: client)
+    monkeypatch.setattr(video, "CALLBACK_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(video, "callback_breaker_state", {})
+    return client
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    sent = OrderedDict()
+    monkeypatch.setattr(video, "webhook_sent_tracker", sent)
+    monkeypatch.setattr(video, "WEBHOOK_TRACKER_TTL", 60)
+    return sent
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    state = {}
+    monkeypatch.setattr(video, "callback_breaker_state", state)
+    monkeypatch.setattr(video, "CALLBACK_BREAKER_FAIL_MAX", 3)
+    monkeypatch.setattr(video, "CALLBACK_BREAKER_RESET_TIMEOUT", 30)
+    return state
+
+
+def test_circuit_opens_after_consecutive_failures(clock, breaker):
+    for _ in range(2):
+        video.record_callback_result("n8n", ok=False)
+    assert not video.callback_circuit_open("n8n")
+    video.record_callback_result("n8n", ok=False)
+    assert video.callback_circuit_open("n8n")
+    assert not video.callback_circuit_open("other-host")
+
+
+def test_circuit_lets_one_trial_through_after_cooldown(clock, breaker):
+    for _ in range(3):
+        video.record_callback_result("n8n", ok=False)
+    clock.now += 29
+    assert video.callback_circuit_open("n8n")
+    clock.now += 1
+    assert not video.callback_circuit_open("n8n")
+    # Concurrent sends stay paused while the trial is in flight
+    assert video.callback_circuit_open("n8n")
+    assert video.callback_circuit_open("n8n")
+    # A trial that never reports back does not block the host for good
+    clock.now += 30
+    assert not video.callback_circuit_open("n8n")
+
+
+def test_failed_trial_reopens_circuit(clock, breaker):
+    for _ in range(3):
+        video.record_callback_result("n8n", ok=False)
+    clock.now += 30
+    assert not video.callback_circuit_open("n8n")
+    video.record_callback_result("n8n", ok=False)
+    clock.now += 29
+    assert video.callback_circuit_open("n8n")
+
+
+def test_successful_trial_closes_circuit(clock, breaker):
+    for _ in range(3):
+        video.record_callback_result("n8n", ok=False)
+    clock.now += 30
+    assert not video.callback_circuit_open("n8n")
+    video.record_callback_result("n8n", ok=True)
+    assert "n8n" not in breaker
+    # The failure count starts over
+    video.record_callback_result("n8n", ok=False)
+    assert not video.callback_circuit_open("n8n")
+
+
+def test_tracker_evicts_oldest_past_cap(monkeypatch, clock, callbacks, tracker):
+    monkeypatch.setattr(video, "WEBHOOK_TRACKER_MAX_ENTRIES", 2)
+    for process_id in ("a", "b", "c"):
+        assert asyncio.run(video.send_callback("http://n8n/hook", {"process_id": process_id}))
+    assert list(tracker) == ["b", "c"]
+
+
+def test_cleanup_drops_only_expired_entries(clock, tracker):
+    tracker["a"] = clock.now - 90
+    tracker["b"] = clock.now - 61
+    tracker["c"] = clock.now - 30
+    video.cleanup_webhook_tracker()
+    assert list(tracker) == ["c"]
+    clock.now += 31
+    video.cleanup_webhook_tracker()
+    assert not tracker
+
+
+def test_tracker_stamps_sends_with_monotonic_clock(clock, callbacks, tracker):
+    assert asyncio.run(video.send_callback("http://n8n/hook", {"process_id": "a"}))
+    assert tracker["a"] == clock.now
+
+
+def test_cleanup_ignores_wall_clock_jumps(monkeypatch, clock, tracker):
+    tracker["a"] = clock.now - 30
+    # An NTP step or DST change moves time.time() but not time.monotonic()
+    monkeypatch.setattr(video.time, "time", lambda: 4e9)
+    video.cleanup_webhook_tracker()
+    assert list(tracker) == ["a"]
+
+
+def test_already_sent_honours_ttl_between_prunes(clock, tracker):
+    tracker["a"] = clock.now
+    assert video.webhook_already_sent("a")
+    assert not video.webhook_already_sent("b")
+    clock.now += 60
+    # Still in the tracker, but expired
+    assert "a" in tracker
+    assert not video.webhook_already_sent("a")
+
+
+def test_duplicate_callback_skipped_until_ttl_passes(clock, callbacks, tracker):
+    data = {"process_id": "a"}
+    assert asyncio.run(video.send_callback("http://n8n/hook", data))
+    assert asyncio.run(video.send_callback("http://n8n/hook", data))
+    assert len(callbacks.requests) == 1
+    clock.now += 60
+    assert asyncio.run(video.send_callback("http://n8n/hook", data))
+    assert len(callbacks.requests) == 2
+
+
+def test_callback_retries_server_errors_with_same_body_and_key(clock, callbacks, tracker):
+    callbacks.outcomes = [503, video.httpx.ConnectError("refused"), 200]
+    assert asyncio.run(video.send_callback("http://n8n/hook", {"process_id": "a"}))
+    assert len(callbacks.requests) == 3
+    assert len({content for _, content, _ in callbacks.requests}) == 1
+    assert [h["Idempotency-Key"] for _, _, h in callbacks.requests] == ["a"] * 3
+
+
+def test_callback_does_not_retry_client_errors(clock, callbacks, tracker):
+    callbacks.outcomes = [400]
+    assert not asyncio.run(video.send_callback("http://n8n/hook", {"process_id": "a"}))
+    assert len(callbacks.requests) == 1
+    assert "a" not in tracker
+
+
+def test_callback_gives_up_after_max_tries(monkeypatch, clock, callbacks, tracker):
+    monkeypatch.setattr(video, "CALLBACK_DEAD_LETTER_DIR", None)
+    callbacks.outcomes = [500] * video.CALLBACK_MAX_TRIES
+    assert not asyncio.run(video.send_callback("http://n8n/hook", {"process_id": "a"}))
+    assert len(callbacks.requests) == video.CALLBACK_MAX_TRIES
+
+
+@pytest.fixture
+def dead_letters(monkeypatch, tmp_path):
+    monkeypatch.setattr(video, "CALLBACK_DEAD_LETTER_DIR", str(tmp_path))
+    monkeypatch.setattr(video, "CALLBACK_REDELIVERY_INTERVAL", 0)
+    return tmp_path
+
+
+async def run_redelivery_until(done, timeout: float = 2.0):
+    """Run the redelivery loop until done() holds, then stop it"""
+    task = asyncio.ensure_future(video.redeliver_dead_letters_periodically())
+    try:
+        for _ in range(int(timeout / 0.01)):
+            if done():
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+
+def test_exhausted_callback_is_dead_lettered(callbacks, tracker, dead_letters):
+    callbacks.outcomes = [503] * video.CALLBACK_MAX_TRIES
+    data = {"process_id": "a", "frames": [1, 2]}
+    assert not asyncio.run(video.send_callback("http://n8n/hook", data))
+    [(path, url, saved)] = video.read_dead_letters()
+    assert path.endswith(".json.gz")
+    assert (url, saved) == ("http://n8n/hook", data)
+
+
+def test_client_error_is_not_dead_lettered(callbacks, tracker, dead_letters):
+    callbacks.outcomes = [422]
+    assert not asyncio.run(video.send_callback("http://n8n/hook", {"process_id": "a"}))
+    assert video.read_dead_letters() == []
+
+
+def test_unreadable_dead_letter_is_skipped(dead_letters):
+    (dead_letters / "broken.json.gz").write_bytes(b"not gzip")
+    video.write_dead_letter("http://n8n/hook", {"process_id": "a"})
+    assert [data for _, _, data in video.read_dead_letters()] == [{"process_id": "a"}]
+
+
+def test_redelivery_removes_delivered_letters(callbacks, tracker, dead_letters):
+    video.write_dead_letter("http://n8n/hook", {"process_id": "a"})
+    asyncio.run(run_redelivery_until(lambda: not list(dead_letters.iterdir())))
+    assert not list(dead_letters.iterdir())
+    assert callbacks.requests[0][0] == "http://n8n/hook"
+
+
+def test_failed_redelivery_keeps_single_letter(callbacks, tracker, dead_letters):
+    path = video.write_dead_letter("http://n8n/hook", {"process_id": "a"})
+    callbacks.outcomes = [503] * 100
+    asyncio.run(run_redelivery_until(lambda: len(callbacks.requests) >= video.CALLBACK_MAX_TRIES))
+    # Left in place for the next sweep rather than saved a second time
+    assert [p for p, _, _ in video.read_dead_letters()] == [path]
+
+
+class FakeProcessor:
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    def create_safe_directory(self, destination_folder, file_name, create_subfolder=True):
+        return self.output_dir
+
+
+def test_airtable_webhook_gets_its_own_json_body(monkeypatch, tmp_path, callbacks, tracker):
+    frames_info = [{"frame_name": "frame_000001.jpg", "drive_file_id": "f1"}]
+    streaming_result = {
+        "success": True, "frames_uploaded": 1, "total_frames": 1, "frames_failed": 0,
+        "folder_id": "folder", "frames_info": frames_info, "frames_manifest": {"count": 1},
+    }
+    monkeypatch.setattr(video, "get_processor", lambda: FakeProcessor(str(tmp_path)))
+    monkeypatch.setattr(video, "get_file_size", lambda path: 1024)
+    monkeypatch.setattr(video, "extract_and_publish_frames", lambda *args, **kwargs: (True, streaming_result))
+    monkeypatch.setattr(video, "FRAME_BATCH_WEBHOOK_URL", None)
+    monkeypatch.setattr(video, "INLINE_FRAMES_INFO", True)
+    monkeypatch.setattr(video, "FRAME_ANALYSIS_WEBHOOK_URL", "http://n8n/airtable")
+    monkeypatch.setattr(video, "FRAME_PROCESSOR_WEBHOOK_URL", "http://n8n/frames")
+    monkeypatch.setattr(video, "WEBHOOK_DELAY_MIN", 0)
+    monkeypatch.setattr(video, "WEBHOOK_DELAY_MAX", 0)
+
+    asyncio.run(video.process_video_task("file-123456", "clip.mp4", str(tmp_path), "http://n8n/callback"))
+
+    bodies = {url: json.loads(content) for url, content, _ in callbacks.requests}
+    assert set(bodies) == {"http://n8n/airtable", "http://n8n/callback", "http://n8n/frames"}
+    airtable, original = bodies["http://n8n/airtable"], bodies["http://n8n/callback"]
+    assert airtable["webhookUrl"] == "http://n8n/airtable"
+    assert airtable["executionMode"] == "production"
+    assert "webhookUrl" not in original
+    assert {k: v for k, v in airtable.items() if k not in ("webhookUrl", "executionMode")} == original
+    assert original["frames_info"] == frames_info
+
+
+class FakeUploader:
+    """Stand-in for GoogleDriveService that records manifest uploads"""
+
+    uploads = []
+
+    def __init__(self, operation_type=None):
+        self.operation_type = operation_type
+
+    def upload_file(self, path, folder_id, mime_type):
+        if folder_id == "broken":
+            raise RuntimeError("quota exceeded")
+        self.uploads.append((self.operation_type, path, folder_id, mime_type))
+        return {"url": f"https://drive.example/{folder_id}/manifest"}
+
+
+@pytest.fixture
+def uploader(monkeypatch):
+    FakeUploader.uploads = []
+    monkeypatch.setattr(video, "GoogleDriveService", FakeUploader)
+    return FakeUploader
+
+
+FRAMES_INFO = [
+    {"filename": "frame_000001.jpg", "path": "/out/frame_000001.jpg", "size_bytes": 100},
+    {"filename": "frame_000002.jpg", "path": "/out/frame_000002.jpg", "size_bytes": 250},
+]
+
+
+def test_manifest_written_as_json_lines(monkeypatch, tmp_path, uploader):
+    monkeypatch.setattr(video, "UPLOAD_FRAMES_MANIFEST", False)
+    manifest = video.publish_frames_manifest(str(tmp_path), FRAMES_INFO, "folder")
+    with open(manifest["path"]) as f:
+        assert [json.loads(line) for line in f] == FRAMES_INFO
+    assert manifest == {
+        "count": 2, "total_bytes": 350, "first": "frame_000001.jpg", "last": "frame_000002.jpg",
+        "path": str(tmp_path / video.FRAMES_MANIFEST_NAME), "url": None,
+    }
+    assert uploader.uploads == []
+
+
+def test_empty_manifest(monkeypatch, tmp_path, uploader):
+    monkeypatch.setattr(video, "UPLOAD_FRAMES_MANIFEST", True)
+    manifest = video.publish_frames_manifest(str(tmp_path), [], None)
+    assert (manifest["count"], manifest["first"], manifest["last"]) == (0, None, None)
+    assert (tmp_path / video.FRAMES_MANIFEST_NAME).read_bytes() == b""
+    # No folder to upload to
+    assert uploader.uploads == []
+
+
+def test_manifest_uploaded_when_enabled(monkeypatch, tmp_path, uploader):
+    monkeypatch.setattr(video, "UPLOAD_FRAMES_MANIFEST", True)
+    manifest = video.publish_frames_manifest(str(tmp_path), FRAMES_INFO, "folder")
+    assert manifest["url"] == "https://drive.example/folder/manifest"
+    assert uploader.uploads == [("upload", manifest["path"], "folder", "application/x-ndjson")]
+
+
+def test_manifest_upload_failure_is_not_fatal(monkeypatch, tmp_path, uploader):
+    monkeypatch.setattr(video, "UPLOAD_FRAMES_MANIFEST", True)
+    manifest = video.publish_frames_manifest(str(tmp_path), FRAMES_INFO, "broken")
+    assert manifest["url"] is None
+    assert manifest["count"] == 2